@@ -1,28 +1,29 @@
 import sys
+import importlib.util
 from pathlib import Path
 import streamlit as st
 
 st.set_page_config(page_title="Study Suite", page_icon="🎒", layout="wide")
 
 
-APP_DIR = Path(__file__).parent
-
-# Example: reading the question bank
-CSV_PATH = APP_DIR / "OneThousand_MCQ.csv"
-# e.g., df = pd.read_csv(CSV_PATH)
-
-
 MCQ_DIR = Path(__file__).parent / "modules" / "MCQ"
 if str(MCQ_DIR) not in sys.path:
     sys.path.insert(0, str(MCQ_DIR))
 
-try:
-    from auth_and_progress import auth_ui, current_user_id
-
-    AUTH_AVAILABLE = True
-except Exception as e:
-    AUTH_AVAILABLE = False
-    AUTH_ERR = e
+# Probe once per session; a missing module then skips the import attempt entirely
+if "auth_available" not in st.session_state:
+    st.session_state.auth_available = (
+        importlib.util.find_spec("auth_and_progress") is not None
+    )
+AUTH_AVAILABLE = st.session_state.auth_available
+AUTH_ERR = f"auth_and_progress not found in {MCQ_DIR}"
+
+if AUTH_AVAILABLE:
+    try:
+        from auth_and_progress import auth_ui, current_user_id
+    except Exception as e:
+        AUTH_AVAILABLE = False
+        AUTH_ERR = e
 
 st.title("Study Suite")
 st.caption("MCQ • Flashcards • Mindmaps • PDF • Tutor")
@@ -0,0 +1,18 @@
+from functools import lru_cache
+import re
+
+# Pages are re-executed on every rerun, so the cache lives here rather than in
+# the page script. Bounded: keys are question HTML, one per card in the deck.
+
+_BR_RE = re.compile(r"<br\s*/?>", re.I)
+_TAG_RE = re.compile(r"<.*?>")
+_WS_RE = re.compile(r"\s+")
+
+def strip_html_to_text(s: str) -> str:
+    return _WS_RE.sub(" ", _TAG_RE.sub("", _BR_RE.sub(" ", s))).strip()
+
+@lru_cache(maxsize=4096)
+def jump_preview(html: str) -> str:
+    """Plain-text question for the Jump list, truncated to 120 chars."""
+    t = strip_html_to_text(html)
+    return t[:117] + "…" if len(t) > 120 else t
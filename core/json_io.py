@@ -0,0 +1,14 @@
+import json
+from pathlib import Path
+
+# orjson is optional: it parses the file's bytes directly, skipping the str
+# decode; the stdlib parser is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def read_json(path: Path):
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    return json.loads(path.read_text(encoding="utf-8"))
@@ -0,0 +1,218 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import shutil, threading, zipfile
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from core.pdf_tools import (
+    DOC_LOCK,
+    HAS_FITZ,
+    display_list,
+    first_page_text_cached,
+    list_pdfs,
+    pdf_info_cached,
+    open_doc,
+    trim_store,
+)
+
+# Canonical zoom steps: a handful of cache keys per page instead of one per 10%
+ZOOM_LEVELS = (80, 100, 120, 140, 160, 200, 240, 300)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def get_page_count(path_str: str, mtime: float) -> int:
+    with DOC_LOCK:
+        return open_doc(path_str, mtime).page_count
+
+# Bounded: each entry is a full-page PNG
+@st.cache_data(show_spinner=False, max_entries=64, ttl=1800)
+def render_page_png(
+    path_str: str, mtime: float, page_index: int, zoom_percent: int
+) -> bytes:
+    import fitz  # PyMuPDF; only reached when HAS_FITZ
+
+    scale = max(50, min(400, int(zoom_percent))) / 100.0
+    mat = fitz.Matrix(scale, scale)
+    with DOC_LOCK:
+        if page_index < 0 or page_index >= open_doc(path_str, mtime).page_count:
+            return b""
+        pix = display_list(path_str, mtime, page_index).get_pixmap(matrix=mat, alpha=False)
+        png = pix.tobytes("png")
+        trim_store()
+        return png
+
+class _Prefetcher:
+    # Neighbour-page renders for the whole process: one worker, so prefetch
+    # never holds DOC_LOCK for more than one page ahead of a reader's own
+    # render; pages already rendered or queued are skipped
+    def __init__(self):
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf-prefetch")
+        self._lock = threading.Lock()
+        self._queued = {}  # render key -> Future
+        self._rendered = OrderedDict()  # keys render_page_png has cached, newest last
+
+    def mark_rendered(self, key: tuple):
+        with self._lock:
+            self._rendered[key] = None
+            self._rendered.move_to_end(key)
+            while len(self._rendered) > 64:  # render_page_png's max_entries
+                self._rendered.popitem(last=False)
+
+    def request(self, keys: list, stale: list):
+        ctx = get_script_run_ctx()
+        with self._lock:
+            # The reader has moved on: drop their earlier requests not yet started
+            for key in stale:
+                fut = self._queued.get(key)
+                if key not in keys and fut is not None and fut.cancel():
+                    del self._queued[key]
+            for key in keys:
+                if key not in self._rendered and key not in self._queued:
+                    self._queued[key] = self._pool.submit(self._run, key, ctx)
+
+    def _run(self, key: tuple, ctx):
+        # Run under the requesting session's context, as st.cache_data expects
+        add_script_run_ctx(threading.current_thread(), ctx)
+        try:
+            render_page_png(*key)
+            self.mark_rendered(key)
+        finally:
+            with self._lock:
+                self._queued.pop(key, None)
+
+@st.cache_resource(show_spinner=False)
+def _prefetcher() -> _Prefetcher:
+    return _Prefetcher()
+
+@st.cache_data(show_spinner=False, ttl=5)
+def _pdf_index(lib_str: str, lib_mtime_ns: int) -> list[tuple[Path, str]]:
+    # (path, widget key suffix) per PDF; rebuilt when the folder changes
+    return [
+        (p, p.name.replace(" ", "_").replace(".", "_"))
+        for p in list_pdfs(Path(lib_str))
+    ]
+
+def _mark_active(key_suffix: str):
+    st.session_state["pdf_nav_active"] = key_suffix
+
+def _upload_tabs(lib: Path):
+    tab1, tab2 = st.tabs(["Upload PDFs", "Upload ZIP of PDFs"])
+    with tab1:
+        files = st.file_uploader(
+            "Select one or more PDFs", type=["pdf"], accept_multiple_files=True
+        )
+        if files and st.button("Save to Library"):
+            for f in files:
+                (lib / f.name).write_bytes(f.getbuffer())
+            st.success(f"Saved {len(files)} file(s) to data/library")
+    with tab2:
+        z = st.file_uploader(
+            "Select a ZIP that contains PDFs", type=["zip"], accept_multiple_files=False
+        )
+        if z and st.button("Extract ZIP to Library"):
+            # UploadedFile is seekable; hand it to ZipFile as-is rather than copying its bytes
+            z.seek(0)
+            count = 0
+            with zipfile.ZipFile(z) as zf:
+                for info in zf.infolist():
+                    if info.filename.lower().endswith(".pdf") and not info.is_dir():
+                        out = lib / Path(info.filename).name
+                        # Stream in 1 MiB chunks rather than holding the whole member
+                        with zf.open(info) as src, open(out, "wb") as dst:
+                            shutil.copyfileobj(src, dst, length=1024 * 1024)
+                            count += 1
+            st.success(f"Extracted {count} PDF(s) into data/library")
+
+def _page_viewer(p: Path, pstat, key_suffix: str):
+    mtime = pstat.st_mtime
+    page_key = f"page_{key_suffix}"
+    zoom_key = f"zoom_{key_suffix}"
+    if page_key not in st.session_state:
+        st.session_state[page_key] = 1
+    if zoom_key not in st.session_state:
+        st.session_state[zoom_key] = 160
+    zoom = st.session_state[zoom_key]
+    if zoom not in ZOOM_LEVELS:  # snaps values left over from the old 10% slider
+        st.session_state[zoom_key] = min(ZOOM_LEVELS, key=lambda z: abs(z - zoom))
+    try:
+        total = get_page_count(str(p), mtime)
+    except Exception as e:
+        total = 1
+        st.warning(f"Could not read PDF: {e}")
+    c1, c2, c3, c4 = st.columns([1, 6, 1, 2])
+    with c1:
+        if st.button("◀", key=f"prev_{key_suffix}") and st.session_state[page_key] > 1:
+            st.session_state[page_key] -= 1
+            _mark_active(key_suffix)
+    with c3:
+        if st.button("▶", key=f"next_{key_suffix}") and st.session_state[
+            page_key
+        ] < max(1, total):
+            st.session_state[page_key] += 1
+            _mark_active(key_suffix)
+    with c2:
+        st.slider(
+            "Page",
+            1,
+            max(1, total),
+            key=page_key,
+            on_change=_mark_active,
+            args=(key_suffix,),
+        )
+    with c4:
+        st.select_slider("Zoom (%)", options=ZOOM_LEVELS, key=zoom_key)
+    try:
+        page_idx = st.session_state[page_key] - 1
+        zoom = st.session_state[zoom_key]
+        png = render_page_png(str(p), mtime, page_idx, zoom)
+        prefetcher = _prefetcher()
+        prefetcher.mark_rendered((str(p), mtime, page_idx, zoom))
+        if png:
+            st.image(png, width="stretch")
+            # Warm the cache for ◀ / ▶ while the reader looks at this page.
+            # Only for the PDF being paged through: every expander renders
+            # on each rerun, and prefetching all of them would slow the page.
+            if st.session_state.get("pdf_nav_active") == key_suffix:
+                keys = [
+                    (str(p), mtime, adj, zoom)
+                    for adj in (page_idx + 1, page_idx - 1)
+                    if 0 <= adj < total
+                ]
+                prefetcher.request(keys, st.session_state.get("pdf_prefetch", []))
+                st.session_state["pdf_prefetch"] = keys
+        else:
+            st.info("No image for this page.")
+    except Exception as e:
+        st.warning(f"Preview failed: {e}")
+        st.code(
+            first_page_text_cached(str(p), pstat.st_mtime_ns, pstat.st_size),
+            language="markdown",
+        )
+
+def render_library_page(lib: Path):
+    lib.mkdir(parents=True, exist_ok=True)
+    _upload_tabs(lib)
+
+    st.markdown("---")
+    st.subheader("Library contents")
+    pdf_index = _pdf_index(str(lib), lib.stat().st_mtime_ns)
+
+    if not pdf_index:
+        st.info("No PDFs found yet. Add some above or drop into data/library and rerun.")
+    else:
+        for p, key_suffix in pdf_index:
+            pstat = p.stat()  # per file, so an overwritten PDF is re-rendered
+            info = pdf_info_cached(str(p), pstat.st_mtime_ns, pstat.st_size)
+            label = f"{p.name} · {info['pages']} pages" if info["pages"] else p.name
+            with st.expander(label, expanded=False):
+                if info["title"]:
+                    st.caption(info["title"])
+                if HAS_FITZ:
+                    _page_viewer(p, pstat, key_suffix)
+                else:
+                    st.info("Install 'pymupdf' for inline preview:  pip install pymupdf")
+                    st.code(
+                        first_page_text_cached(str(p), pstat.st_mtime_ns, pstat.st_size),
+                        language="markdown",
+                    )
+
+    st.caption("Tip: drop files directly into data/library on disk if you prefer.")
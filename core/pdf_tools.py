@@ -1,14 +1,70 @@
 
+import importlib.util
+import os
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict
-from pypdf import PdfReader
+from typing import TYPE_CHECKING, List, Dict
+import streamlit as st
+
+if TYPE_CHECKING:
+    import fitz
+
+# Probe only: PyMuPDF (or the pypdf fallback) is imported on first use, so
+# loading this module doesn't pay for either library up front
+HAS_FITZ = importlib.util.find_spec("fitz") is not None
+
+# Streamlit runs each session in its own thread and MuPDF documents are not
+# thread-safe, so work on a shared open_doc() handle happens under this lock
+DOC_LOCK = threading.Lock()
+
+@lru_cache(maxsize=8)
+def open_doc(path_str: str, mtime: float) -> "fitz.Document":
+    # Kept open across reruns so page/zoom changes skip re-parsing the xref;
+    # mtime is part of the key so an edited file is reopened
+    import fitz
+
+    return fitz.open(path_str)
+
+@lru_cache(maxsize=32)
+def display_list(path_str: str, mtime: float, page_index: int) -> "fitz.DisplayList":
+    # The page's parsed content stream; re-rasterizing it at another zoom
+    # skips interpreting the page again. Call with DOC_LOCK held.
+    return open_doc(path_str, mtime)[page_index].get_displaylist()
+
+def trim_store():
+    # MuPDF's global store (decoded images, fonts) is shared by every session
+    # in the process and this PyMuPDF exposes no setter for its cap. Halving it
+    # after each render keeps it near one page's working set; emptying it
+    # (100%) made the next render ~10x slower. Call with DOC_LOCK held.
+    import fitz
+
+    fitz.TOOLS.store_shrink(50)
+
+@st.cache_data(show_spinner=False, ttl=5)
+def _scan_pdfs(folder_str: str, mtime_ns: int) -> List[Path]:
+    # One scandir pass; DirEntry caches the file type, so only symlinks need a stat
+    with os.scandir(folder_str) as it:
+        return sorted(
+            Path(e.path)
+            for e in it
+            if e.is_file() and e.name.lower().endswith(".pdf")
+        )
 
 def list_pdfs(folder: Path) -> List[Path]:
     folder.mkdir(parents=True, exist_ok=True)
-    return sorted([p for p in folder.glob("*.pdf") if p.is_file()])
+    return _scan_pdfs(str(folder), folder.stat().st_mtime_ns)
 
 def pdf_info(pdf_path: Path) -> Dict:
     try:
+        if HAS_FITZ:
+            import fitz
+
+            with fitz.open(str(pdf_path)) as d:
+                title = (d.metadata or {}).get("title")
+                return {"name": pdf_path.name, "pages": d.page_count, "title": title or ""}
+        from pypdf import PdfReader
+
         reader = PdfReader(str(pdf_path))
         pages = len(reader.pages)
         title = reader.metadata.get("/Title") if reader.metadata else None
@@ -18,6 +74,28 @@ def pdf_info(pdf_path: Path) -> Dict:
 
 def first_page_text(pdf_path: Path, max_chars: int = 800) -> str:
     try:
+        if HAS_FITZ:
+            import fitz
+
+            # One sequential read, then parse from memory (avoids many small
+            # reads when the library sits on a slow or network filesystem)
+            data = Path(pdf_path).read_bytes()
+            with fitz.open(stream=data, filetype="pdf") as d:
+                if d.page_count == 0:
+                    return ""
+                page = d.load_page(0)
+                r = page.rect
+                text = ""
+                # Clip to the top third first so MuPDF can skip drawing ops in the
+                # rest of the page; only fall back to the full page if too short
+                for frac in (0.33, 1.0):
+                    clip = fitz.Rect(r.x0, r.y0, r.x1, r.y0 + r.height * frac)
+                    text = page.get_text("text", clip=clip) or ""
+                    if len(text) >= max_chars:
+                        break
+                return text[:max_chars]
+        from pypdf import PdfReader
+
         reader = PdfReader(str(pdf_path))
         if len(reader.pages) == 0:
             return ""
@@ -25,3 +103,12 @@ def first_page_text(pdf_path: Path, max_chars: int = 800) -> str:
         return text[:max_chars]
     except Exception:
         return ""
+
+@st.cache_data(show_spinner=False)
+def pdf_info_cached(path_str: str, mtime_ns: int, size: int) -> Dict:
+    # mtime_ns/size only key the cache so edited files are re-parsed
+    return pdf_info(Path(path_str))
+
+@st.cache_data(show_spinner=False)
+def first_page_text_cached(path_str: str, mtime_ns: int, size: int, max_chars: int = 800) -> str:
+    return first_page_text(Path(path_str), max_chars)
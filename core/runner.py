@@ -1,5 +1,5 @@
 
-import sys, runpy, os
+import sys, os, functools
 import streamlit as st
 from pathlib import Path
 
@@ -14,26 +14,66 @@ def _patch_set_page_config():
         except Exception:
             pass
 
+class EnvSecrets:
+    """Read-through stand-in for st.secrets backed by os.environ (no copy)."""
+    def __getitem__(self, key):
+        return os.environ[key]
+    def get(self, key, default=None):
+        return os.environ.get(key, default)
+    def __contains__(self, key):
+        return key in os.environ
+
 def _patch_safe_secrets():
     # If no secrets.toml exists, let st.secrets read from env to avoid StreamlitSecretNotFoundError
+    if getattr(st, "_ssuite_secrets_patched", False):
+        return
     default_paths = [
         Path.home() / ".streamlit" / "secrets.toml",
         Path.cwd() / ".streamlit" / "secrets.toml",
     ]
     if any(p.exists() for p in default_paths):
         return
-    class EnvSecrets(dict):
-        def get(self, key, default=None):  # type: ignore[override]
-            return os.environ.get(key, default)
     try:
-        st.secrets = EnvSecrets(os.environ.copy())  # type: ignore[attr-defined]
+        st.secrets = EnvSecrets()  # type: ignore[attr-defined]
+        st._ssuite_secrets_patched = True
     except Exception:
         pass
 
+@functools.lru_cache(maxsize=None)
+def _compile(script: str, mtime_ns: int):
+    # mtime_ns only keys the cache, so an edited script is recompiled
+    return compile(Path(script).read_text(encoding="utf-8"), script, "exec")
+
+def _run_script(script: Path):
+    code = _compile(str(script), script.stat().st_mtime_ns)
+    exec(code, {"__name__": "__main__", "__file__": str(script)})
+
+_PATH_SET = set(sys.path)
+
 def ensure_path(path):
     path = str(path)
-    if path not in sys.path:
-        sys.path.insert(0, path)
+    if path not in _PATH_SET:
+        if path not in sys.path:
+            sys.path.insert(0, path)
+        _PATH_SET.add(path)
+
+_auth_module = None
+
+def _auth_and_progress():
+    # Imported once per process; sys.modules keeps it alive across reruns
+    global _auth_module
+    if _auth_module is None:
+        import importlib
+        _auth_module = importlib.import_module("auth_and_progress")
+    return _auth_module
+
+def unified_auth_ui():
+    sess = st.session_state.get("sb_session")
+    if sess and sess.get("user"):
+        return sess["user"]
+    with st.sidebar:
+        st.info("Sign in on the Home page to access MCQs.")
+    return None
 
 def require_login():
     sess = st.session_state.get("sb_session")
@@ -45,16 +85,8 @@ def require_login():
 def run_mcq_app(mcq_dir):
     mcq_dir = Path(mcq_dir)
     ensure_path(mcq_dir.as_posix())
-    import importlib
-    ap = importlib.import_module("auth_and_progress")
+    ap = _auth_and_progress()
     original_auth_ui = getattr(ap, "auth_ui", None)
-    def unified_auth_ui():
-        sess = st.session_state.get("sb_session")
-        if sess and sess.get("user"):
-            return sess["user"]
-        with st.sidebar:
-            st.info("Sign in on the Home page to access MCQs.")
-        return None
     ap.auth_ui = unified_auth_ui  # type: ignore
     _patch_set_page_config()
     _patch_safe_secrets()
@@ -66,9 +98,12 @@ def run_mcq_app(mcq_dir):
             st.session_state.pop("mode", None)
     except Exception:
         pass
-    runpy.run_path(str(app_py), init_globals={"__name__": "__main__"})
-    if original_auth_ui is not None:
-        ap.auth_ui = original_auth_ui  # type: ignore
+    # Restore even when the app calls st.stop(): Home imports the real auth_ui
+    try:
+        _run_script(app_py)
+    finally:
+        if original_auth_ui is not None:
+            ap.auth_ui = original_auth_ui  # type: ignore
 
 def run_flashcards_app(flash_dir):
     flash_dir = Path(flash_dir)
@@ -76,7 +111,7 @@ def run_flashcards_app(flash_dir):
     _patch_set_page_config()
     _patch_safe_secrets()
     script = flash_dir / "streamlit_app.py"
-    runpy.run_path(str(script), init_globals={"__name__": "__main__"})
+    _run_script(script)
 
 def run_mindmap_app(mind_dir):
     mind_dir = Path(mind_dir)
@@ -84,4 +119,4 @@ def run_mindmap_app(mind_dir):
     _patch_set_page_config()
     _patch_safe_secrets()
     script = mind_dir / "app_simple.py"
-    runpy.run_path(str(script), init_globals={"__name__": "__main__"})
+    _run_script(script)
@@ -0,0 +1,28 @@
+from functools import lru_cache
+import streamlit as st
+
+# Pages are re-executed on every rerun, so these caches live here rather than in
+# the page script. Inputs are a small closed set (theme colours x a few alphas).
+
+@lru_cache(maxsize=64)
+def hex_to_rgba(hex_color: str, alpha: float) -> str:
+    h = (hex_color or "").lstrip("#")
+    if len(h) == 3:
+        h = "".join([c * 2 for c in h])
+    if len(h) != 6:
+        return f"rgba(154,160,166,{alpha})"
+    r = int(h[0:2], 16)
+    g = int(h[2:4], 16)
+    b = int(h[4:6], 16)
+    return f"rgba({r},{g},{b},{alpha})"
+
+# Theme options are fixed for the life of the server process
+@lru_cache(maxsize=32)
+def theme_option(key: str, default: str) -> str:
+    try:
+        v = st.get_option(key)
+        if v is None or v == "" or str(v).lower() == "none":
+            return default
+        return v
+    except Exception:
+        return default
@@ -1,10 +1,18 @@
-import json
 import random
 import re
+import sys
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
+import numpy as np
 import streamlit as st
 
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.flashcard_text import jump_preview, strip_html_to_text
+from core.json_io import read_json
+
 # ============== Page config ==============
 st.set_page_config(page_title="RETS Flashcards", layout="wide")
 
@@ -50,6 +58,9 @@ def chapter_label(n: int) -> str:
     return f"Chapter {n} - {title}" if title else f"Chapter {n}"
 
 
+JUMP_PAGE_SIZE = 50  # Jump list buttons rendered per page
+
+
 # ============== Styles & helpers ==============
 # Bold green ONLY inside the Q/A HTML
 st.markdown(
@@ -65,11 +76,11 @@ st.markdown(
 )
 
 # Escape literal $ so Markdown won't parse LaTeX; otherwise render HTML as-is
-_dollar_re = re.compile(r"(?<!\\)\$")
+_DOLLAR_RE = re.compile(r"(?<!\\)\$")
 
 
 def escape_dollars(s: Optional[str]) -> str:
-    return _dollar_re.sub(r"\\$", s or "")
+    return _DOLLAR_RE.sub(r"\\$", s or "")
 
 
 # Query-param helpers (new & old Streamlit)
@@ -107,9 +118,10 @@ def do_rerun() -> None:
             pass
 
 
-# Keyboard nav component (runs in an iframe; use window.top to modify parent URL)
-st.components.v1.html(
-    """
+# Keyboard nav component (runs in an iframe; use window.top to modify parent URL).
+# Streamlit drops elements that a rerun doesn't emit, so it must be emitted every
+# run; keeping the payload a constant lets the frontend reuse the mounted iframe.
+KBD_NAV_HTML = """
 <script>
 (function(){
   function go(dir){
@@ -124,9 +136,8 @@ st.components.v1.html(
   }, true);
 })();
 </script>
-""",
-    height=0,
-)
+"""
+st.components.v1.html(KBD_NAV_HTML, height=0)
 
 
 # ============== Data loaders ==============
@@ -135,27 +146,27 @@ def load_chapter(num: int) -> List[Dict]:
     fn = DATA_DIR / f"ch_{num:02d}.json"
     if not fn.exists():
         return []
-    return json.loads(fn.read_text(encoding="utf-8"))
+    return read_json(fn)
 
 
 @st.cache_data(show_spinner=False)
-def load_all_chapters() -> Dict[int, List[Dict]]:
-    data = {}
-    # Change 1 to 0 if you add Preface at ch_00.json
-    for i in range(0, 27):
-        cards = load_chapter(i)
-        if cards:
-            data[i] = cards
-    # If you added Preface:
-    # pre = load_chapter(0)
-    # if pre: data[0] = pre
-    return data
+def list_chapters() -> List[int]:
+    """Chapter numbers that have a ch_NN.json file AND a title (no JSON parsing)."""
+    nums = []
+    for fn in DATA_DIR.glob("ch_*.json"):
+        tail = fn.stem[3:]
+        if tail.isdigit() and int(tail) in CHAPTER_TITLES:
+            nums.append(int(tail))
+    return sorted(nums)
+
 
+class LazyChapters(dict):
+    """{chapter: cards} that only reads a chapter file on first access."""
 
-def strip_html_to_text(s: str) -> str:
-    s = re.sub(r"<br\s*/?>", " ", s, flags=re.I)
-    s = re.sub(r"<.*?>", "", s)
-    return re.sub(r"\s+", " ", s).strip()
+    def __missing__(self, num: int) -> List[Dict]:
+        cards = load_chapter(num)
+        self[num] = cards
+        return cards
 
 
 # ============== Session state ==============
@@ -165,13 +176,16 @@ ss.setdefault("index", 0)
 ss.setdefault("show_answer", False)
 ss.setdefault("search", "")
 ss.setdefault("mode", "Chapter")  # "Chapter" or "All"
-ss.setdefault("order", [])  # list[tuple] of (scope, chapter, idx)
+ss.setdefault("order", ())  # tuple of (scope, chapter, idx)
+ss.setdefault("order_pos", {})  # {(scope, chapter, idx): position in order}
 ss.setdefault("lock_order", False)  # keeps randomized order across reruns
-ss.setdefault("view_counts", {})  # {(ch, idx): count}
+ss.setdefault("view_counts", None)  # uint16 array [chapter, idx], allocated lazily
 ss.setdefault("last_key", None)
 ss.setdefault("jump_open_pos", None)  # which Jump item is expanded inline
+ss.setdefault("jump_page", 0)  # which page of the Jump list is shown
 
-all_data = load_all_chapters()
+available = list_chapters()
+all_data = LazyChapters()
 
 # ============== Sidebar ==============
 with st.sidebar:
@@ -185,19 +199,19 @@ with st.sidebar:
         ss.jump_open_pos = None
 
     st.markdown("## Search")
-    new_search = st.text_input(
-        "Keyword (Q or A)", value=ss.search, placeholder="search…"
-    )
-    if new_search != ss.search:
+    # A form only reruns on submit, so typing doesn't rebuild the working set per keystroke
+    with st.form("search_form", clear_on_submit=False):
+        new_search = st.text_input(
+            "Keyword (Q or A)", value=ss.search, placeholder="search…"
+        )
+        submitted = st.form_submit_button("Search")
+    if submitted and new_search != ss.search:
         ss.search = new_search
         ss.lock_order = False
         ss.jump_open_pos = None
 
     if ss.mode == "Chapter":
         st.markdown("## Chapters")
-        # Show only chapters that exist AND are in your title map
-        available = [n for n in sorted(all_data.keys()) if n in CHAPTER_TITLES]
-        # If using Preface, ensure 0 is included appropriately
         selected = st.radio(
             "Select a chapter",
             available,
@@ -213,57 +227,75 @@ with st.sidebar:
 
 
 # ============== Build working set ==============
+@st.cache_data(show_spinner=False)
+def chapter_search_text(num: int) -> List[str]:
+    """Per-card 'question ␞ answer' plain text, so one regex call tests a card."""
+    return [
+        strip_html_to_text(c.get("question", ""))
+        + " \u241e "
+        + strip_html_to_text(c.get("answer", ""))
+        for c in load_chapter(num)
+    ]
+
+
 def build_working_set() -> List[Tuple[str, int, int]]:
     """Return a list of tuples: ('C' or 'A', chapter, index)."""
+    term = ss.search.strip()
+    # One compile per rebuild; re keeps recent patterns in its own cache
+    pat = re.compile(re.escape(term), re.I) if term else None
     if ss.mode == "Chapter":
-        cards = all_data.get(ss.chapter, [])
-        if ss.search.strip():
-            pat = re.compile(re.escape(ss.search.strip()), re.I)
-            idxs = [
-                i
-                for i in range(len(cards))
-                if pat.search(cards[i].get("question", ""))
-                or pat.search(cards[i].get("answer", ""))
-            ]
+        if pat:
+            texts = chapter_search_text(ss.chapter)
+            idxs = [i for i, t in enumerate(texts) if pat.search(t)]
         else:
-            idxs = list(range(len(cards)))
+            idxs = range(len(all_data[ss.chapter]))
         return [("C", ss.chapter, i) for i in idxs]
     else:
         tuples: List[Tuple[str, int, int]] = []
-        for ch, cards in all_data.items():
-            if ch not in CHAPTER_TITLES:
-                continue
-            for i in range(len(cards)):
-                tuples.append(("A", ch, i))
-        if ss.search.strip():
-            pat = re.compile(re.escape(ss.search.strip()), re.I)
-            tuples = [
-                t
-                for t in tuples
-                if pat.search(all_data[t[1]][t[2]].get("question", ""))
-                or pat.search(all_data[t[1]][t[2]].get("answer", ""))
-            ]
+        # Only "All" mode needs every chapter loaded
+        for ch in available:
+            if pat:
+                texts = chapter_search_text(ch)
+                tuples.extend(("A", ch, i) for i, t in enumerate(texts) if pat.search(t))
+            else:
+                tuples.extend(("A", ch, i) for i in range(len(all_data[ch])))
         return tuples
 
 
+# Callbacks run before the rerun, so the click is reflected in that same run
+def open_jump_preview(pos: int) -> None:
+    ss.index = pos
+    ss.jump_open_pos = pos  # expand this item inline
+
+
+def close_jump_preview() -> None:
+    ss.jump_open_pos = None
+
+
+def set_order(tuples) -> None:
+    """Store the working order as a tuple plus a {tuple: position} index."""
+    ss.order = tuple(tuples)
+    ss.order_pos = {t: pos for pos, t in enumerate(ss.order)}
+
+
 def ensure_order() -> None:
     tuples = build_working_set()
     if not ss.order:
-        ss.order = tuples
+        set_order(tuples)
         ss.index = 0
         return
 
     if ss.lock_order:
         # Keep the shuffled order; drop invalid items
         valid = set(tuples)
-        ss.order = [t for t in ss.order if t in valid]
+        set_order(t for t in ss.order if t in valid)
         ss.index = max(0, min(ss.index, len(ss.order) - 1))
         return
 
     # Rebuild sequential order (when not locked)
     current = ss.order[ss.index] if 0 <= ss.index < len(ss.order) else None
-    ss.order = tuples
-    ss.index = ss.order.index(current) if current in ss.order else 0
+    set_order(tuples)
+    ss.index = ss.order_pos.get(current, 0)
 
 
 ensure_order()
@@ -307,7 +339,7 @@ with col_rand_ch:
         ss.lock_order = True
         tuples = build_working_set()
         random.shuffle(tuples)
-        ss.order = tuples
+        set_order(tuples)
         ss.index = 0
         ss.jump_open_pos = None
         do_rerun()
@@ -318,7 +350,7 @@ with col_rand_all:
         ss.lock_order = True
         tuples = build_working_set()
         random.shuffle(tuples)
-        ss.order = tuples
+        set_order(tuples)
         ss.index = 0
         ss.jump_open_pos = None
         do_rerun()
@@ -329,14 +361,26 @@ if not ss.order:
 else:
     scope, ch, i = ss.order[ss.index]
     card = all_data[ch][i]
+    q_html, a_html = card.get("question", ""), card.get("answer", "")
 
     # View counter (increments only when card actually changes)
     key = (ch, i)
+    vc = ss.view_counts
+    if not isinstance(vc, np.ndarray) or ch >= vc.shape[0] or i >= vc.shape[1]:
+        # Grow (or first allocate) to fit; 2 bytes per card instead of a dict entry
+        shape = (max(ch + 1, 27), max(i + 1, 2048))
+        if isinstance(vc, np.ndarray):
+            shape = (max(shape[0], vc.shape[0]), max(shape[1], vc.shape[1]))
+        grown = np.zeros(shape, dtype=np.uint16)
+        if isinstance(vc, np.ndarray):
+            grown[: vc.shape[0], : vc.shape[1]] = vc
+        ss.view_counts = vc = grown
     if ss.last_key != key:
-        ss.view_counts[key] = ss.view_counts.get(key, 0) + 1
+        if vc[ch, i] < 65535:
+            vc[ch, i] += 1
         ss.last_key = key
     with col_views:
-        st.metric("Views", ss.view_counts.get(key, 0))
+        st.metric("Views", int(vc[ch, i]))
 
     # Use your custom title in the header
     if ss.mode == "All":
@@ -350,14 +394,14 @@ else:
     with qcol:
         st.markdown("**Question**")
         st.markdown(
-            f"<div class='qa-content'>{escape_dollars(card.get('question',''))}</div>",
+            f"<div class='qa-content'>{escape_dollars(q_html)}</div>",
             unsafe_allow_html=True,
         )
     with acol:
         st.markdown("**Answer**")
         if ss.show_answer:
             st.markdown(
-                f"<div class='qa-content'>{escape_dollars(card.get('answer',''))}</div>",
+                f"<div class='qa-content'>{escape_dollars(a_html)}</div>",
                 unsafe_allow_html=True,
             )
         else:
@@ -365,17 +409,36 @@ else:
 
     # ========== Jump list with inline expansion ==========
     with st.expander("Jump to…"):
-        for pos, tup in enumerate(ss.order):
+        # One page of buttons at a time; thousands of widgets make "All" mode crawl
+        n_pages = max(1, -(-len(ss.order) // JUMP_PAGE_SIZE))
+        ss.jump_page = max(0, min(ss.jump_page, n_pages - 1))
+        if n_pages > 1:
+            pg_prev, pg_label, pg_next = st.columns([1, 4, 1])
+            with pg_prev:
+                if st.button("⟵", key="jump_page_prev", disabled=ss.jump_page <= 0):
+                    ss.jump_page -= 1
+            with pg_next:
+                if st.button(
+                    "⟶", key="jump_page_next", disabled=ss.jump_page >= n_pages - 1
+                ):
+                    ss.jump_page += 1
+            with pg_label:
+                st.caption(f"Page {ss.jump_page+1} of {n_pages}")
+        start = ss.jump_page * JUMP_PAGE_SIZE
+        for pos, tup in enumerate(
+            ss.order[start : start + JUMP_PAGE_SIZE], start=start
+        ):
             _, ch2, i2 = tup
-            qtext = strip_html_to_text(all_data[ch2][i2].get("question", ""))
-            if len(qtext) > 120:
-                qtext = qtext[:117] + "…"
+            card2 = all_data[ch2][i2]
+            qtext = jump_preview(card2.get("question", ""))
             prefix = f"[{chapter_label(ch2)}] " if ss.mode == "All" else ""
             # Each item: button + optional inline preview right under it
-            if st.button(f"{prefix}{pos+1}. {qtext}", key=f"jump_{ch2}_{i2}"):
-                ss.index = pos
-                ss.jump_open_pos = pos  # expand this item inline
-                # Streamlit reruns automatically on button click
+            st.button(
+                f"{prefix}{pos+1}. {qtext}",
+                key=f"jump_{ch2}_{i2}",
+                on_click=open_jump_preview,
+                args=(pos,),
+            )
 
             if ss.jump_open_pos == pos:
                 # Full Q & A inline (always show both, per your request)
@@ -383,16 +446,18 @@ else:
                     st.markdown("<div class='jump-preview'>", unsafe_allow_html=True)
                     st.markdown("**Question**")
                     st.markdown(
-                        f"<div class='qa-content'>{escape_dollars(all_data[ch2][i2].get('question',''))}</div>",
+                        f"<div class='qa-content'>{escape_dollars(card2.get('question',''))}</div>",
                         unsafe_allow_html=True,
                     )
                     st.markdown("**Answer**")
                     st.markdown(
-                        f"<div class='qa-content'>{escape_dollars(all_data[ch2][i2].get('answer',''))}</div>",
+                        f"<div class='qa-content'>{escape_dollars(card2.get('answer',''))}</div>",
                         unsafe_allow_html=True,
                     )
                     # Close preview
-                    if st.button("Close preview", key=f"close_{ch2}_{i2}"):
-                        ss.jump_open_pos = None
-                        do_rerun()
+                    st.button(
+                        "Close preview",
+                        key=f"close_{ch2}_{i2}",
+                        on_click=close_jump_preview,
+                    )
                     st.markdown("</div>", unsafe_allow_html=True)
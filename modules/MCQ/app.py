@@ -1,11 +1,10 @@
 from __future__ import annotations
-import os, re, random
+import os, re, random, bisect
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
 from dotenv import load_dotenv
-import unicodedata
-from auth_and_progress import auth_ui, load_progress, save_progress
-from csv_loader import load_questions_from_csv  # must support the `calc` column
-from supabase import create_client
+from auth_and_progress import auth_ui, load_progress, save_progress, settle_progress
+from csv_loader import load_questions  # must support the `calc` column
 
 
 # Try to load local .env (only works if file exists)
@@ -20,8 +19,7 @@ if not url or not key:
         "❌ Supabase is not configured. Please set SUPABASE_URL and SUPABASE_ANON_KEY."
     )
 else:
-    supabase = create_client(url, key)
-
+    # The client itself is the shared one from supabase_client.get_supabase()
     st.set_page_config(
         page_title="Real Estate Exam Questions", page_icon="📚", layout="wide"
     )
@@ -34,40 +32,24 @@ st.title("📚 BC Real Estate Exam MCQ")
 
 
 # -------------------- Helpers --------------------
-# normalize weird whitespace and fix digit/letter run-ons like "200and"
-
-
-# Map a bunch of invisible spaces to a normal space
-_INVISIBLES = {
-    ord("\u00a0"): " ",  # NBSP
-    ord("\u202f"): " ",  # narrow NBSP
-    ord("\u2009"): " ",  # thin space
-    ord("\u2007"): " ",  # figure space
-    ord("\u200a"): " ",  # hair space
-    ord("\u200b"): " ",  # zero-width space
-    ord("\u200c"): " ",  # ZWNJ
-    ord("\u200d"): " ",  # ZWJ
-    ord("\u2060"): " ",  # WORD JOINER
-    ord("\ufeff"): " ",  # BOM / ZWNBSP
-}
-
-
-def clean_label(s: str) -> str:
-    if not s:
-        return s
-    # Normalize Unicode, then replace a bunch of invisibles with regular spaces
-    s = unicodedata.normalize("NFKC", s).translate(_INVISIBLES)
-    # Collapse multiple spaces
-    s = re.sub(r"[ \t]+", " ", s)
-
-    # Ensure a space between digits and letters both directions
-    s = re.sub(r"(\d)([A-Za-z])", r"\1 \2", s)  # 200and -> 200 and
-    s = re.sub(r"([A-Za-z])(\d)", r"\1 \2", s)  # and200 -> and 200
+_RE_DIGITS = re.compile(r"(\d+)")
+
+_MODES = (
+    "All",
+    "Range",
+    "Random N",
+    "Wrong only",
+    "Not done yet",
+    "Calculation only",
+    "Non-calculation only",
+)
+_MODE_IDX = {m: i for i, m in enumerate(_MODES)}
 
-    # Ensure a space before a minus that starts a number, if stuck to previous token
-    s = re.sub(r"(\S)([-–—])(\$?\d)", r"\1 \2\3", s)
 
-    return s.strip()
+def _stop():
+    # st.stop() ends the run early; send pending progress first
+    settle_progress()
+    st.stop()
 
 
 def is_correct_mc_single(question: dict, choice_idx: int) -> bool:
@@ -79,16 +61,12 @@ def _update_progress(qid: str, correct: bool, deck_id: str | None = None):
     p["attempts"] = int(p.get("attempts", 0)) + 1
     p["correct"] = int(p.get("correct", 0)) + (1 if correct else 0)
 
-    seen = set(p.get("seen_ids", []))
-    seen.add(qid)
-    p["seen_ids"] = list(seen)
-
-    wrong = set(p.get("wrong_ids", []))
+    # seen_ids / wrong_ids are sets in memory (see auth_and_progress._normalize_progress)
+    p["seen_ids"].add(qid)
     if correct:
-        wrong.discard(qid)
+        p["wrong_ids"].discard(qid)
     else:
-        wrong.add(qid)
-    p["wrong_ids"] = list(wrong)
+        p["wrong_ids"].add(qid)
 
     if deck_id:
         deck = p.setdefault("by_deck", {}).setdefault(
@@ -97,7 +75,14 @@ def _update_progress(qid: str, correct: bool, deck_id: str | None = None):
         deck["attempts"] += 1
         deck["correct"] += 1 if correct else 0
 
-    save_progress(p)  # guarded in auth_and_progress.py
+    # Written once per rerun (and throttled) by settle_progress() before the script ends
+    st.session_state._progress_dirty = True
+    _bump_progress_rev()
+
+
+def _bump_progress_rev():
+    # Lets build_worklist tell whether wrong/seen ids changed without copying them
+    st.session_state._progress_rev = st.session_state.get("_progress_rev", 0) + 1
 
 
 def mark_attempt(question: dict, selected_choice_idx: int):
@@ -119,14 +104,80 @@ def clamp_index(i: int, n: int) -> int:
     return max(0, min(i, max(0, n - 1)))
 
 
-def load_questions_from_disk():
+@st.cache_data(show_spinner=False)
+def _load_questions_cached(path: str, mtime_ns: int, size: int):
+    # mtime_ns/size only key the cache so an edited CSV is re-parsed.
+    # This runs on the prefetch thread, where st.warning would be dropped, so
+    # loader warnings come back as data and are shown by the script thread.
+    warnings: list[str] = []
+    questions, problems = load_questions(path, warn=warnings.append)
+    return questions, problems, warnings
+
+
+@st.cache_resource(show_spinner=False)
+def _parse_pool() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=1)
+
+
+def _questions_csv_path() -> str | None:
     base = os.path.dirname(__file__)
-    p1 = os.path.join(base, FALLBACK_PRIMARY)
-    if os.path.exists(p1):
-        return load_questions_from_csv(p1)
-    p2 = os.path.join(base, FALLBACK_SECONDARY)
-    if os.path.exists(p2):
-        return load_questions_from_csv(p2)
+    for name in (FALLBACK_PRIMARY, FALLBACK_SECONDARY):
+        p = os.path.join(base, name)
+        if os.path.exists(p):
+            return p
+    return None
+
+
+def _questions_sig(path: str) -> tuple:
+    stat = os.stat(path)
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+def prefetch_questions():
+    """Start parsing a new CSV version in the background (joined in load_questions_from_disk)."""
+    path = _questions_csv_path()
+    if path is None:
+        return
+    sig = _questions_sig(path)
+    if st.session_state.get("_questions_sig") == sig:
+        return
+    pending = st.session_state.get("_questions_future")
+    if pending is None or pending[0] != sig:
+        st.session_state["_questions_future"] = (
+            sig,
+            _parse_pool().submit(_load_questions_cached, *sig),
+        )
+
+
+def _load_questions_versioned(path: str):
+    """Parse once per file version; later reruns reuse the session's copy."""
+    sig = _questions_sig(path)
+    if st.session_state.get("_questions_sig") != sig:
+        pending = st.session_state.pop("_questions_future", None)
+        if pending is not None and pending[0] == sig:
+            questions, problems, warnings = pending[1].result()
+        else:
+            questions, problems, warnings = _load_questions_cached(*sig)
+        for w in warnings:
+            st.warning(w)
+        st.session_state["_questions"] = (questions, problems)
+        st.session_state["_questions_sig"] = sig
+        # Lookup tables built once per question set, reused by every rerun
+        st.session_state["q_by_id"] = {q["id"]: q for q in questions}
+        st.session_state["qint_by_id"] = qint = {q["id"]: id_to_int(q["id"]) for q in questions}
+        st.session_state["calc_qs"] = [q for q in questions if q.get("is_calc")]
+        st.session_state["noncalc_qs"] = [q for q in questions if not q.get("is_calc")]
+        # Sorted by Question_int (stable, so CSV order breaks ties) for Range slicing
+        by_int = sorted(questions, key=lambda q: qint[q["id"]])
+        st.session_state["q_sorted_by_int"] = by_int
+        st.session_state["q_int_keys"] = [qint[q["id"]] for q in by_int]
+    return st.session_state["_questions"]
+
+
+def load_questions_from_disk():
+    path = _questions_csv_path()
+    if path is not None:
+        return _load_questions_versioned(path)
     return [], [
         {
             "row_num": "-",
@@ -136,49 +187,101 @@ def load_questions_from_disk():
 
 
 # ------- Sticky selection for Random N / Shuffle -------
-def _selection_fingerprint():
-    return {
-        "mode": st.session_state.get("mcq_mode", "All"),
-        "range_start": st.session_state.get("mcq_range_start"),
-        "range_end": st.session_state.get("mcq_range_end"),
-        "random_n": st.session_state.get("mcq_random_n"),
-        "shuffle": st.session_state.get("shuffle", False),
-    }
+def _selection_fingerprint() -> tuple:
+    # (mode, range_start, range_end, random_n, shuffle)
+    ss = st.session_state
+    return (
+        ss.get("mcq_mode", "All"),
+        ss.get("mcq_range_start"),
+        ss.get("mcq_range_end"),
+        ss.get("mcq_random_n"),
+        ss.get("shuffle", False),
+    )
 
 
 def _reset_cached_selection():
-    for k in ["_cached_fp", "_cached_ids"]:
+    for k in ["_cached_fp", "_cached_ids", "_worklist_key", "_worklist", "_worklist_jump"]:
         st.session_state.pop(k, None)
     st.session_state["idx"] = 0
 
 
 def build_worklist(questions: list[dict]) -> list[dict]:
     fp = _selection_fingerprint()
+    mode = fp[0]
     cached_fp = st.session_state.get("_cached_fp")
     cached_ids = st.session_state.get("_cached_ids")
 
-    mode = fp["mode"]
-    shuffle = bool(fp["shuffle"])
-    wrong_ids = set(st.session_state.progress.get("wrong_ids", []))
-    seen_ids = set(st.session_state.progress.get("seen_ids", []))
+    # Nothing changed since the last rerun → reuse last rerun's worklist.
+    # Only the progress-driven modes depend on wrong/seen ids.
+    rev = (
+        st.session_state.get("_progress_rev", 0)
+        if mode in ("Wrong only", "Not done yet")
+        else None
+    )
+    memo_key = (fp, st.session_state.get("_questions_sig"), rev)
+    if cached_fp == fp and st.session_state.get("_worklist_key") == memo_key:
+        return st.session_state["_worklist"]
+    wl = _build_worklist(questions, fp, cached_fp, cached_ids)
+    st.session_state["_worklist_key"] = memo_key
+    st.session_state["_worklist"] = wl
+    st.session_state.pop("_worklist_jump", None)  # jump_to index of the old list
+    return wl
+
+
+def _jump_index(worklist: list[dict]) -> tuple[list[int], list[int]]:
+    """(sorted Question_ints, their worklist positions), built once per worklist."""
+    cached = st.session_state.get("_worklist_jump")
+    if cached is not None and cached[0] is worklist:
+        return cached[1]
+    qint_by_id = st.session_state.get("qint_by_id", {})
+    pairs = sorted(
+        (qint_by_id.get(q["id"], id_to_int(q["id"])), i) for i, q in enumerate(worklist)
+    )
+    index = ([k for k, _ in pairs], [i for _, i in pairs])
+    st.session_state["_worklist_jump"] = (worklist, index)
+    return index
+
+
+def _build_worklist(questions, fp, cached_fp, cached_ids) -> list[dict]:
+    mode, range_start, range_end, random_n, shuffle = fp
+    shuffle = bool(shuffle)
+    q_by_id = st.session_state.get("q_by_id") or {q["id"]: q for q in questions}
+    wrong_ids = st.session_state.progress["wrong_ids"]
+    seen_ids = st.session_state.progress["seen_ids"]
 
     # Build pool per mode (Random N handled later)
     if mode == "All":
         pool = questions
     elif mode == "Range":
-        start = int(fp.get("range_start") or 1)
-        end = int(fp.get("range_end") or start)
+        start = int(range_start or 1)
+        end = int(range_end or start)
         if start > end:
             start, end = end, start
-        pool = [q for q in questions if start <= id_to_int(q["id"]) <= end]
+        keys = st.session_state.get("q_int_keys")
+        if keys is None:
+            pool = [q for q in questions if start <= id_to_int(q["id"]) <= end]
+        else:
+            lo = bisect.bisect_left(keys, start)
+            hi = bisect.bisect_right(keys, end)
+            pool = st.session_state["q_sorted_by_int"][lo:hi]
     elif mode == "Wrong only":
-        pool = [q for q in questions if q["id"] in wrong_ids]
+        # Walk the (small) wrong set rather than the whole bank; sort so the
+        # order doesn't depend on set iteration
+        qint = st.session_state.get("qint_by_id") or {}
+        pool = sorted(
+            (q_by_id[i] for i in wrong_ids if i in q_by_id),
+            key=lambda q: qint.get(q["id"], id_to_int(q["id"])),
+        )
     elif mode == "Not done yet":
         pool = [q for q in questions if q["id"] not in seen_ids]
     elif mode == "Calculation only":
-        pool = [q for q in questions if q.get("is_calc")]
+        pool = st.session_state.get("calc_qs")
+        if pool is None:
+            pool = [q for q in questions if q.get("is_calc")]
     elif mode == "Non-calculation only":
-        pool = [q for q in questions if not q.get("is_calc")]
+        pool = st.session_state.get("noncalc_qs")
+        if pool is None:
+            pool = [q for q in questions if not q.get("is_calc")]
     elif mode == "Random N":
         pool = questions  # (change to a filtered pool if you want)
     else:
@@ -188,32 +291,34 @@ def build_worklist(questions: list[dict]) -> list[dict]:
     if mode == "Random N":
         need_new = (cached_fp != fp) or (cached_ids is None)
         if need_new:
-            n = int(fp.get("random_n") or 10)
-            n = max(1, min(n, len(pool)))
-            sample = random.sample(pool, n)
-            ids = [q["id"] for q in sample]
+            n = int(random_n or 10)
+            # Sample ids, not the question dicts
+            pool_ids = list(dict.fromkeys(q["id"] for q in pool))
+            n = max(1, min(n, len(pool_ids)))
+            ids = random.sample(pool_ids, n)
             st.session_state["_cached_ids"] = ids
             st.session_state["_cached_fp"] = fp
         ids = st.session_state["_cached_ids"]
-        worklist = [q for q in pool if q["id"] in set(ids)]
-        order = {qid: i for i, qid in enumerate(ids)}
-        worklist.sort(key=lambda q: order[q["id"]])
-        return worklist
+        return [q_by_id[i] for i in ids if i in q_by_id]
 
     # Non–Random N: also cache order (with optional shuffle)
     need_new = (cached_fp != fp) or (cached_ids is None)
     if need_new:
-        ids = [q["id"] for q in pool]
+        # Ordered dedupe: a repeated id in the CSV maps to one q_by_id entry,
+        # so listing it twice would just show the same question twice
+        ids = list(dict.fromkeys(q["id"] for q in pool))
         if shuffle:
             random.shuffle(ids)
         st.session_state["_cached_ids"] = ids
         st.session_state["_cached_fp"] = fp
 
     ids = st.session_state["_cached_ids"]
-    wl = [q for q in pool if q["id"] in set(ids)]
-    order = {qid: i for i, qid in enumerate(ids)}
-    wl.sort(key=lambda q: order[q["id"]])
-    return wl
+    # ids is already in display order. Cached ids from an earlier run may have
+    # left the pool (e.g. a wrong answer since corrected); one set pass drops them.
+    if not need_new and pool is not questions:
+        pool_ids = {q["id"] for q in pool}
+        ids = [i for i in ids if i in pool_ids]
+    return [q_by_id[i] for i in ids if i in q_by_id]
 
 
 def jump_to(query: str, worklist: list[dict]) -> int:
@@ -225,31 +330,34 @@ def jump_to(query: str, worklist: list[dict]) -> int:
     if not s:
         return st.session_state.get("idx", 0)
 
-    m = re.search(r"(\d+)", s)
+    m = _RE_DIGITS.search(s)
     if not m:
         return st.session_state.get("idx", 0)
     wanted = int(m.group(1))
 
-    for i, q in enumerate(worklist):
-        if id_to_int(q["id"]) == wanted:
-            return i
+    keys, positions = _jump_index(worklist)
+    pos = bisect.bisect_left(keys, wanted)
+    if pos < len(keys) and keys[pos] == wanted:
+        return positions[pos]
 
     st.info(
         f"Q{wanted} isn’t in the current selection (mode/filter). Showing nearest available item."
     )
-    if worklist:
-        wl_ids = [id_to_int(q["id"]) for q in worklist]
-        nearest_idx = min(range(len(wl_ids)), key=lambda i: abs(wl_ids[i] - wanted))
-        return nearest_idx
+    if keys:
+        # Nearest ID is one of the two neighbours of the insertion point
+        near = range(max(0, pos - 1), min(pos + 1, len(keys)))
+        return positions[min(near, key=lambda k: abs(keys[k] - wanted))]
 
     return st.session_state.get("idx", 0)
 
 
 # -------------------- Auth --------------------
+# Parse the CSV while the auth UI (and its Supabase round trips) renders
+prefetch_questions()
 user = auth_ui()
 if not user:
     st.info("Sign in from the **sidebar → Account** to continue.")
-    st.stop()
+    _stop()
 
 # -------------------- Load progress (guarded) --------------------
 if "progress_loaded" not in st.session_state:
@@ -258,6 +366,7 @@ if "progress_loaded" not in st.session_state:
 if "progress" not in st.session_state or not st.session_state.progress_loaded:
     st.session_state.progress = load_progress()
     st.session_state.progress_loaded = True
+    _bump_progress_rev()
 
 # -------------------- Load questions (no upload UI) --------------------
 questions, problems = load_questions_from_disk()
@@ -267,30 +376,14 @@ if problems:
             st.write(p)
 if not questions:
     st.error("No questions loaded.")
-    st.stop()
+    _stop()
 
 # -------------------- Settings panel (left) --------------------
 st.sidebar.header("Settings")
 mode = st.sidebar.radio(
     "Choose set to practice",
-    [
-        "All",
-        "Range",
-        "Random N",
-        "Wrong only",
-        "Not done yet",
-        "Calculation only",
-        "Non-calculation only",
-    ],
-    index=[
-        "All",
-        "Range",
-        "Random N",
-        "Wrong only",
-        "Not done yet",
-        "Calculation only",
-        "Non-calculation only",
-    ].index(st.session_state.get("mcq_mode", "All")),
+    _MODES,
+    index=_MODE_IDX.get(st.session_state.get("mcq_mode", "All"), 0),
     key="mode",
 )
 if mode == "Range":
@@ -310,10 +403,11 @@ if st.sidebar.button("Reset progress & settings"):
     st.session_state.progress = {
         "attempts": 0,
         "correct": 0,
-        "wrong_ids": [],
-        "seen_ids": [],
+        "wrong_ids": set(),
+        "seen_ids": set(),
     }
     save_progress(st.session_state.progress)
+    _bump_progress_rev()
     for k in [
         "idx",
         "mode",
@@ -324,6 +418,9 @@ if st.sidebar.button("Reset progress & settings"):
         "always_show",
         "_cached_fp",
         "_cached_ids",
+        "_worklist_key",
+        "_worklist",
+        "_worklist_jump",
     ]:
         if k in st.session_state:
             del st.session_state[k]
@@ -333,7 +430,7 @@ if st.sidebar.button("Reset progress & settings"):
 worklist = build_worklist(questions)
 if not worklist:
     st.warning("No questions in current selection")
-    st.stop()
+    _stop()
 
 # Nav
 t1, t2, t3 = st.columns([1, 2, 1])
@@ -370,8 +467,8 @@ st.markdown(q["prompt"], unsafe_allow_html=True)
 # )
 selected = st.radio(
     "Choose an answer:",
-    options=list(range(len(q["choices"]))),
-    format_func=lambda i: clean_label(q["choices"][i]),
+    options=q["choice_indices"],
+    format_func=lambda i: q["choice_labels"][i],  # cleaned at load (csv_loader._choices_col)
     key=f"q_choice_{q['id']}",
 )
 
@@ -401,3 +498,6 @@ st.markdown("---")
 st.write(
     f"{idx+1} / {len(worklist)} ({active_mode}) • Attempts: {attempts} • Correct: {correct_ct} • Accuracy: {acc}"
 )
+
+# -------------------- Persist progress --------------------
+settle_progress()
@@ -22,8 +22,11 @@ def _apply_session_to_client():
     try:
         access = sess.get("access_token")
         refresh = sess.get("refresh_token")
-        if access and refresh:
+        # The client is shared by every session in the process, so remember
+        # which token it currently holds rather than what this session sent
+        if access and refresh and getattr(sb, "_applied_token", None) != access:
             sb.auth.set_session(access_token=access, refresh_token=refresh)
+            sb._applied_token = access
     except Exception:
         pass
 
@@ -68,10 +71,14 @@ def auth_ui():
         with st.sidebar:
             st.success(f"Signed in as {user.get('email')}")
             if st.button("Log out"):
+                # Send throttled writes; the upsert is synchronous, so it lands
+                # while this session's token is still valid
+                flush_progress(force=True)
                 try:
                     supabase.auth.sign_out()
                 except Exception:
                     pass
+                supabase._applied_token = None
                 st.session_state.sb_session = None
                 # ensure next login reloads from server before saving
                 for k in ("progress_loaded", "progress_baseline"):
@@ -137,25 +144,15 @@ def current_user_id() -> str | None:
 
 
 # ------------------------ Progress Load/Save ------------------------
-DEFAULT_PROGRESS = {
-    "attempts": 0,
-    "correct": 0,
-    "wrong_ids": [],
-    "seen_ids": [],
-}
-
-
 def _normalize_progress(p: dict | None) -> dict:
-    if not p:
-        return DEFAULT_PROGRESS.copy()
-    out = DEFAULT_PROGRESS.copy()
-    out["attempts"] = int((p.get("attempts") or 0))
-    out["correct"] = int((p.get("correct") or 0))
-    wi = p.get("wrong_ids") or []
-    si = p.get("seen_ids") or []
-    out["wrong_ids"] = list(wi) if isinstance(wi, list) else list(wi)
-    out["seen_ids"] = list(si) if isinstance(si, list) else list(si)
-    return out
+    """In memory the id collections are sets; they become lists only at upsert time."""
+    p = p or {}
+    return {
+        "attempts": int((p.get("attempts") or 0)),
+        "correct": int((p.get("correct") or 0)),
+        "wrong_ids": set(p.get("wrong_ids") or ()),
+        "seen_ids": set(p.get("seen_ids") or ()),
+    }
 
 
 def _fetch_server_progress(sb, uid: str) -> dict:
@@ -167,6 +164,18 @@ def _fetch_server_progress(sb, uid: str) -> dict:
     return _normalize_progress(row)
 
 
+# A server row read by SELECT is trusted for this long before save_progress
+# re-reads it. Only a real read restarts the clock: our own writes don't, so
+# progress made on another device is picked up at least this often.
+BASELINE_TTL_S = 60
+
+
+def _set_baseline(p: dict, fetched: bool = False) -> None:
+    st.session_state.progress_baseline = _normalize_progress(p)
+    if fetched:
+        st.session_state.progress_fetched_at = time.time()
+
+
 def load_progress() -> dict:
     uid = current_user_id()
     if not uid:
@@ -178,22 +187,23 @@ def load_progress() -> dict:
     try:
         server_p = _fetch_server_progress(sb, uid)
     except Exception:
-        server_p = DEFAULT_PROGRESS.copy()
+        server_p = _normalize_progress(None)
 
     # Store a baseline snapshot for delta merges later (multi-device safety)
-    st.session_state.progress_baseline = server_p.copy()
+    _set_baseline(server_p, fetched=True)
     return server_p
 
 
-def save_progress(p: dict) -> None:
+def save_progress(p: dict) -> bool:
     """
-    Merge-save to Supabase:
-      - Read server's current row
+    Merge-save to Supabase; returns True once the upsert is confirmed:
+      - Read server's current row (or reuse the baseline if the last read is fresh)
       - Compute local deltas since baseline
       - Add deltas to server counters
       - Merge sets:
           seen_ids = union(server, local)
           wrong_ids = union(server, local) - (locally corrected set)
+      - Upsert; the baseline advances only if it succeeds
     """
     # Ensure we loaded once this session
     if not st.session_state.get("progress_loaded", False):
@@ -203,7 +213,7 @@ def save_progress(p: dict) -> None:
             st.session_state.progress_loaded = True
         except Exception:
             st.warning("Skipping save: progress not loaded yet.")
-            return
+            return False
 
     uid = current_user_id()
     if not uid:
@@ -212,16 +222,21 @@ def save_progress(p: dict) -> None:
     _apply_session_to_client()
     sb = get_supabase()
 
-    # 1) Get server and baseline
-    try:
-        server = _fetch_server_progress(sb, uid)
-    except Exception as e:
-        st.warning(
-            f"Could not read server progress; falling back to simple upsert. ({e})"
-        )
-        server = DEFAULT_PROGRESS.copy()
-
-    baseline = st.session_state.get("progress_baseline") or server.copy()
+    # 1) Get server and baseline (skip the round-trip while the last read is fresh)
+    baseline = st.session_state.get("progress_baseline")
+    age = time.time() - st.session_state.get("progress_fetched_at", 0)
+    if baseline is not None and age < BASELINE_TTL_S:
+        server = baseline
+    else:
+        try:
+            server = _fetch_server_progress(sb, uid)
+            st.session_state.progress_fetched_at = time.time()
+        except Exception as e:
+            st.warning(
+                f"Could not read server progress; falling back to simple upsert. ({e})"
+            )
+            server = _normalize_progress(None)
+        baseline = baseline or server
 
     # 2) Compute deltas vs baseline (avoid double counting across devices)
     local_attempts = int(p.get("attempts", 0))
@@ -237,10 +252,10 @@ def save_progress(p: dict) -> None:
     merged_correct = int(server.get("correct", 0)) + d_correct
 
     # 4) Merge sets
-    local_seen = set(p.get("seen_ids", []) or [])
-    local_wrong = set(p.get("wrong_ids", []) or [])
-    server_seen = set(server.get("seen_ids", []) or [])
-    server_wrong = set(server.get("wrong_ids", []) or [])
+    local_seen = set(p.get("seen_ids") or ())
+    local_wrong = set(p.get("wrong_ids") or ())
+    server_seen = server["seen_ids"]
+    server_wrong = server["wrong_ids"]
 
     merged_seen = sorted(server_seen | local_seen)
 
@@ -258,14 +273,51 @@ def save_progress(p: dict) -> None:
         "updated_at": "now()",
     }
 
-    # 5) Save and update the baseline to the merged view (so future deltas are from this point)
+    # 5) Save on the script thread: the shared client carries this session's
+    #    token only until another session applies its own, and errors surface
+    #    here rather than on some later save. The baseline moves to the merged
+    #    view only once the write is confirmed, so a failed write is re-sent.
     try:
         sb.table("progress").upsert(payload).execute()
-        st.session_state.progress_baseline = {
-            "attempts": merged_attempts,
-            "correct": merged_correct,
-            "wrong_ids": merged_wrong,
-            "seen_ids": merged_seen,
-        }
     except Exception as e:
+        st.session_state.progress_fetched_at = 0  # server state unknown: re-read next time
         st.warning(f"Progress save failed: {e}")
+        return False
+    _set_baseline(payload)
+    return True
+
+
+# ------------------------ Coalesced writes ------------------------
+# Rapid submits within this window are folded into a single upsert
+PROGRESS_FLUSH_S = 5
+
+
+def flush_progress(force: bool = False) -> None:
+    """Save progress marked dirty by answer submits; throttled unless force=True."""
+    if not st.session_state.get("_progress_dirty"):
+        return
+    last = st.session_state.get("_progress_flushed_at", 0.0)
+    if not force and time.monotonic() - last < PROGRESS_FLUSH_S:
+        return
+    st.session_state._progress_flushed_at = time.monotonic()
+    # Stays dirty until the write is confirmed, so a failed save is retried
+    if save_progress(st.session_state.progress):
+        st.session_state._progress_dirty = False
+
+
+def _flush_when_due():
+    flush_progress()
+
+
+# A write held back by the throttle is sent by this timer even if the user
+# stops clicking (st.fragment is st.experimental_fragment before 1.37)
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+if _fragment is not None:
+    _flush_when_due = _fragment(run_every=PROGRESS_FLUSH_S)(_flush_when_due)
+
+
+def settle_progress() -> None:
+    """End-of-run hook: call before the script ends, st.stop() or st.rerun()."""
+    flush_progress()
+    if st.session_state.get("_progress_dirty"):
+        _flush_when_due()
@@ -3,8 +3,10 @@ import csv
 import io
 import os
 import re
-import unicodedata
-from typing import List, Tuple, Dict, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
 
 # Optional but recommended: auto-detect encoding
 try:
@@ -46,20 +48,30 @@ _INVISIBLES = {
 }
 
 
-def _normalize_text(s: str) -> str:
-    if s is None:
-        return ""
-    s = unicodedata.normalize("NFKC", s)
-    s = s.translate(_INVISIBLES)
-    return s
+# Display cleanup for choice labels: fix digit/letter run-ons like "200and"
+_RE_SPACES = re.compile(r"[ \t]+")
+_RE_DL = re.compile(r"(\d)([A-Za-z])")
+_RE_LD = re.compile(r"([A-Za-z])(\d)")
+_RE_MINUS = re.compile(r"(\S)([-–—])(\$?\d)")
 
 
 # --------- Encoding-robust file read ---------
-def _read_csv_text(csv_path: str) -> str:
+# Enough text for charset-normalizer to identify the encoding
+_PROBE_BYTES = 64 * 1024
+
+
+def _probe_encoding(data: bytes) -> Optional[str]:
+    probe = cn_from_bytes(data).best()
+    return probe.encoding if probe else None
+
+
+def _read_csv_text(csv_path: str, warn: Callable[[str], Any] = st.warning) -> str:
     """
     Read CSV file text robustly:
     - Try UTF-8 with BOM first
-    - If that fails, use charset-normalizer if available
+    - If that fails, use charset-normalizer (on the first 64 KB) if available;
+      an all-ASCII prefix, or a guess the full text rejects, is re-probed on
+      the whole file
     - Otherwise fall back to latin1 (never fails)
     """
     # 1) Fast path: UTF-8 (accept BOM)
@@ -71,148 +83,251 @@ def _read_csv_text(csv_path: str) -> str:
     except FileNotFoundError:
         raise
 
-    # 2) charset-normalizer (if installed)
+    # 2) charset-normalizer (if installed): probe a prefix, then decode straight from disk
     if cn_from_bytes is not None:
         try:
+            with open(csv_path, "rb") as fb:
+                head = fb.read(_PROBE_BYTES)
+            # UTF-8 already failed, so an all-ASCII prefix says nothing about
+            # where the non-ASCII bytes are; skip straight to the full probe
+            if not head.isascii():
+                enc = _probe_encoding(head)
+                if enc:
+                    try:
+                        with open(csv_path, "r", encoding=enc, newline="") as f:
+                            return f.read()
+                    except UnicodeDecodeError:
+                        pass
             with open(csv_path, "rb") as fb:
                 raw = fb.read()
-            probe = cn_from_bytes(raw).best()
-            if probe and probe.encoding:
-                enc = probe.encoding
+            enc = _probe_encoding(raw)
+            if enc:
                 try:
-                    return raw.decode(enc, errors="strict")
+                    return raw.decode(enc)
                 except UnicodeDecodeError:
-                    st.warning(
-                        f"Decoded with '{enc}' using replacement for invalid bytes."
-                    )
+                    warn(f"Decoded with '{enc}' using replacement for invalid bytes.")
                     return raw.decode(enc, errors="replace")
         except Exception:
             pass
 
     # 3) Last resort: latin1
-    st.warning("Decoding CSV with latin1 fallback.")
+    warn("Decoding CSV with latin1 fallback.")
     with open(csv_path, "r", encoding="latin1", newline="") as f:
         return f.read()
 
 
 # --------- Row parsing (match your schema) ---------
-def parse_correct_index(answer_field: str) -> int:
-    """
-    Accepts either:
-      - integer index as string ('3' meaning zero-based? or 1-based?), or
-      - 'Correct Option: 4' style (1-based)
-    Returns zero-based index.
-    """
-    s = _normalize_text(answer_field or "").strip()
-    if not s:
-        raise ValueError("Empty answer field")
-    # Try "Correct Option: 4" pattern
-    m = re.search(r"(\d+)", s)
-    if not m:
-        raise ValueError(f"Cannot parse correct option from: {s}")
-    idx1 = int(m.group(1))
-    if idx1 <= 0:
-        raise ValueError(f"Correct option must be >= 1, got {idx1}")
-    return idx1 - 1
-
-
-def parse_choices(choices_text: str) -> List[str]:
-    """
-    Choices are pipe-separated. Keep inner spaces; strip Excel's leading apostrophe; normalize invisible spaces.
-    """
-    raw = choices_text or ""
-    parts = raw.split("|")
-    cleaned = []
-    for c in parts:
-        if c is None:
-            continue
-        c = _normalize_text(c)
-        if c.startswith("'"):  # Excel "Text" marker
-            c = c[1:]
-        # Keep inner spacing; only lstrip so " | foo" is okay, but inner 'and ' stays
-        c = c.lstrip()
-        cleaned.append(c)
-    return [x for x in cleaned if x.strip() != ""]
-
-
-def row_to_question(row: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Build the question dict your app expects.
-    Required CSV columns (case-sensitive): question, choices, answer, Question_int
-    Optional: back, calc
-    """
-    qtext = _normalize_text(row.get("question", ""))
-    choices = parse_choices(row.get("choices", ""))
-    if not choices:
-        raise ValueError("No choices parsed")
+# The answer field is "4" or "Correct Option: 4" style (1-based)
+_DIGIT_RE = re.compile(r"(\d+)")
+_TRUTHY = ("1", "true", "yes", "y", "t")
+_CHOICE_TUPLES = ["choice_indices", "choice_labels"]
+
+
+def _add_choice_tuples(df: pd.DataFrame) -> pd.DataFrame:
+    # st.radio options/labels, baked once instead of per rerun
+    df["choice_indices"] = df["choices"].map(lambda c: tuple(range(len(c))))
+    df["choice_labels"] = df["choices"].map(tuple)
+    return df
+
+
+def _col(df: pd.DataFrame, name: str) -> pd.Series:
+    """Raw column as str ('' when the column is missing)."""
+    if name not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    return df[name]
 
-    correct_index = parse_correct_index(row.get("answer", ""))
 
-    # optional explanation/back; render as HTML later
-    back_html = _normalize_text(row.get("back", ""))
+def _norm_col(df: pd.DataFrame, name: str) -> pd.Series:
+    """NFKC + invisible-space cleanup; only non-ASCII cells pay for it."""
+    col = _col(df, name)
+    non_ascii = ~col.map(str.isascii).astype(bool)
+    if non_ascii.any():
+        col = col.copy()
+        col[non_ascii] = (
+            col[non_ascii].str.normalize("NFKC").str.translate(_INVISIBLES)
+        )
+    return col
 
-    # calc flag can be '1', 'true', 'yes', etc.
-    calc_raw = str(row.get("calc", "")).strip().lower()
-    is_calc = calc_raw in ("1", "true", "yes", "y", "t")
 
-    # Question_int / id
-    qid_raw = row.get("Question_int") or row.get("id") or row.get("qid")
-    if qid_raw is None or str(qid_raw).strip() == "":
-        raise ValueError("Missing Question_int")
+def _read_frame(text: str) -> pd.DataFrame:
+    opts = dict(dtype=str, keep_default_na=False, index_col=False)
     try:
-        qid = int(str(qid_raw).strip())
-    except Exception:
-        raise ValueError(f"Invalid Question_int: {qid_raw}")
+        df = pd.read_csv(io.StringIO(text), **opts)
+    except pd.errors.EmptyDataError:
+        return pd.DataFrame()
+    except pd.errors.ParserError:
+        # Rows with extra fields: keep the named columns like csv.DictReader does
+        n = len(next(csv.reader(io.StringIO(text)), []))
+        df = pd.read_csv(
+            io.StringIO(text),
+            engine="python",
+            on_bad_lines=lambda fields: fields[:n],
+            **opts,
+        )
+    # Short rows come back as NA; csv.DictReader gave None, which row.get treats as ""
+    return df.fillna("")
 
-    return {
-        "id": str(qid),
-        "prompt": qtext,  # may include HTML (e.g., j<sub>12</sub>)
-        "choices": choices,
-        "correct_index": int(correct_index),
-        "explanation_html": back_html,  # safe-rendered with unsafe_allow_html=True
-        "is_calc": is_calc,
-        "deck_id": None,  # optional; keep for progress bucketing
-    }
+
+def _choices_col(df: pd.DataFrame) -> pd.Series:
+    """
+    Per-row list of display-ready choices. Choices are pipe-separated; Excel's
+    leading apostrophe is stripped and digit/letter run-ons like "200and" are
+    spaced out, so rendering needs no regex work. Empty choices are dropped.
+    """
+    parts = _norm_col(df, "choices").str.split("|").explode()
+    parts = parts.str.replace(r"^'", "", regex=True)  # Excel "Text" marker
+    parts = parts.str.replace(_RE_SPACES, " ", regex=True)
+    parts = parts.str.replace(_RE_DL, r"\1 \2", regex=True)
+    parts = parts.str.replace(_RE_LD, r"\1 \2", regex=True)
+    parts = parts.str.replace(_RE_MINUS, r"\1 \2\3", regex=True)
+    parts = parts.str.strip()
+    parts = parts[parts != ""]
+    grouped = parts.groupby(level=0).agg(list)
+    return grouped.reindex(df.index).map(lambda c: c if isinstance(c, list) else [])
 
 
 # --------- Public API ---------
 def load_questions_from_csv(
     csv_path: str,
+    warn: Optional[Callable[[str], Any]] = None,
 ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     """
     Load questions robustly from CSV.
-    Returns (questions, problems) where problems is a list of {"row_num", "error", "row"}.
+    Returns (questions, problems) where problems is a list of {"row_num", "error", "q_preview"}.
+    Required columns (case-sensitive): question, choices, answer, Question_int
+    (falling back to id / qid); optional: back, calc. Parsing is column-wise (pandas).
+    warn receives user-facing warnings (default st.warning); pass e.g. list.append
+    when parsing off the script thread, where st.* calls are dropped.
     """
+    warn = warn or st.warning
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"CSV not found at: {csv_path}")
 
-    text = _read_csv_text(csv_path)
-    sio = io.StringIO(text)
-
-    reader = csv.DictReader(sio)
-    questions: List[Dict[str, Any]] = []
-    problems: List[Dict[str, Any]] = []
+    df = _read_frame(_read_csv_text(csv_path, warn))
 
     # Basic header sanity
-    headers = [h.strip() for h in (reader.fieldnames or [])]
+    headers = [str(h).strip() for h in df.columns]
     expected = {"question", "choices", "answer", "Question_int"}
     missing = expected - set(headers)
     if missing:
-        st.warning(f"CSV missing expected columns: {sorted(missing)}")
+        warn(f"CSV missing expected columns: {sorted(missing)}")
+    if df.empty:
+        return [], []
 
-    for i, row in enumerate(
-        reader, start=2
-    ):  # start=2 so row_num matches spreadsheet line numbers
+    choices = _choices_col(df)
+    n_choices = choices.map(len)
+
+    answer = _norm_col(df, "answer").str.strip()
+    idx1 = pd.to_numeric(answer.str.extract(_DIGIT_RE, expand=False), errors="coerce")
+    correct_index = idx1 - 1
+
+    # Question_int, falling back to id / qid when empty
+    qid_raw = _col(df, "Question_int")
+    for alt in ("id", "qid"):
+        qid_raw = qid_raw.where(qid_raw != "", _col(df, alt))
+    qid = qid_raw.str.strip()
+    qid_ok = qid.str.fullmatch(r"[+-]?\d+")
+
+    # First failing check wins
+    checks = [
+        (n_choices == 0, "No choices parsed"),
+        (answer == "", "Empty answer field"),
+        (idx1.isna(), "Cannot parse correct option from: " + answer),
+        (idx1 <= 0, "Correct option must be >= 1, got " + idx1.astype("Int64").astype(str)),
+        (qid == "", "Missing Question_int"),
+        (~qid_ok, "Invalid Question_int: " + qid_raw),
+        (
+            correct_index >= n_choices,
+            "correct_index " + correct_index.astype("Int64").astype(str)
+            + " out of range for " + n_choices.astype(str) + " choices",
+        ),
+    ]
+    error = pd.Series(
+        np.select(
+            [c.fillna(False).to_numpy(dtype=bool) for c, _ in checks],
+            [np.broadcast_to(np.asarray(m, dtype=object), len(df)) for _, m in checks],
+            default=None,
+        ),
+        index=df.index,
+    )
+    ok = error.isna()
+
+    good = pd.DataFrame(
+        {
+            "id": qid[ok].astype(int).astype(str),
+            "prompt": _norm_col(df, "question")[ok],  # may include HTML (e.g., j<sub>12</sub>)
+            "choices": choices[ok],
+            "correct_index": correct_index[ok].astype(int),
+            "explanation_html": _norm_col(df, "back")[ok],  # safe-rendered with unsafe_allow_html=True
+            "is_calc": _col(df, "calc")[ok].str.strip().str.lower().isin(_TRUTHY),
+            "deck_id": None,  # optional; keep for progress bucketing
+        }
+    )
+    questions: List[Dict[str, Any]] = _add_choice_tuples(good).to_dict("records")
+
+    # row_num = record index + 2 so it matches spreadsheet line numbers.
+    # Only a short question preview is kept: a misnamed column can fail every
+    # row, and copying whole rows would hold all of their HTML.
+    bad = ~ok
+    problems: List[Dict[str, Any]] = [
+        {"row_num": int(i) + 2, "error": err, "q_preview": preview}
+        for i, err, preview in zip(
+            df.index[bad], error[bad], _col(df, "question")[bad].str.slice(0, 120)
+        )
+    ]
+    return questions, problems
+
+
+# Binary sidecar next to the CSV (OneThousand_MCQ.csv -> OneThousand_MCQ.parquet).
+# Needs pyarrow; set MCQ_PARQUET_CACHE=0 to always parse the CSV.
+PARQUET_CACHE = os.getenv("MCQ_PARQUET_CACHE", "1") != "0"
+# Schema metadata key holding the source CSV's "mtime_ns:size"
+_SIDECAR_SIG_KEY = b"mcq_csv_sig"
+
+
+def _csv_sig(csv_path: str) -> bytes:
+    stat = os.stat(csv_path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}".encode()
+
+
+def load_questions(
+    csv_path: str, warn: Optional[Callable[[str], Any]] = None
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    load_questions_from_csv, but served from a Parquet sidecar built from this exact
+    CSV (same mtime_ns and size; a newer-or-older mtime is not enough, since cp -p,
+    unzip or git checkout can restore an older file). The sidecar is only written
+    for a clean parse so that row problems keep being reported.
+    """
+    if not PARQUET_CACHE:
+        return load_questions_from_csv(csv_path, warn)
+    sidecar = os.path.splitext(csv_path)[0] + ".parquet"
+    sig = _csv_sig(csv_path)
+    try:
+        import pyarrow.parquet as pq
+
+        meta = pq.read_schema(sidecar).metadata or {}
+        if meta.get(_SIDECAR_SIG_KEY) == sig:
+            df = pq.read_table(sidecar).to_pandas()
+            df["choices"] = df["choices"].map(list)
+            df["deck_id"] = None
+            return _add_choice_tuples(df).to_dict("records"), []
+    except Exception:
+        pass  # missing/stale/unreadable sidecar or no pyarrow: parse the CSV
+
+    questions, problems = load_questions_from_csv(csv_path, warn)
+    if questions and not problems:
         try:
-            q = row_to_question(row)
-            # bounds-check correct index
-            if not (0 <= q["correct_index"] < len(q["choices"])):
-                raise ValueError(
-                    f"correct_index {q['correct_index']} out of range for {len(q['choices'])} choices"
-                )
-            questions.append(q)
-        except Exception as e:
-            # record the problem but don't crash the app
-            problems.append({"row_num": i, "error": str(e), "row": dict(row)})
+            import pyarrow as pa
+            import pyarrow.parquet as pq
 
+            # The choice tuples are derived, so they are rebuilt on read
+            table = pa.Table.from_pandas(
+                pd.DataFrame(questions).drop(columns=_CHOICE_TUPLES), preserve_index=False
+            )
+            meta = dict(table.schema.metadata or {})
+            meta[_SIDECAR_SIG_KEY] = sig  # stat taken before the parse
+            pq.write_table(table.replace_schema_metadata(meta), sidecar)
+        except Exception:
+            pass  # read-only folder or no pyarrow; next load parses again
     return questions, problems
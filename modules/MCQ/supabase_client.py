@@ -1,16 +1,20 @@
-from supabase import create_client, Client
+from __future__ import annotations
 import os
+from typing import TYPE_CHECKING
+import streamlit as st
 from dotenv import load_dotenv
 
 load_dotenv()
-_supabase: Client | None = None
 
+if TYPE_CHECKING:
+    from supabase import Client
+
+@st.cache_resource(show_spinner=False)
 def get_supabase() -> Client:
-    global _supabase
-    if _supabase is None:
-        url = os.getenv("SUPABASE_URL")
-        key = os.getenv("SUPABASE_ANON_KEY")
-        if not url or not key:
-            raise RuntimeError("Missing SUPABASE_URL / SUPABASE_ANON_KEY")
-        _supabase = create_client(url, key)
-    return _supabase
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_ANON_KEY")
+    if not url or not key:
+        raise RuntimeError("Missing SUPABASE_URL / SUPABASE_ANON_KEY")
+    from supabase import create_client  # deferred: heavy import, only needed once
+
+    return create_client(url, key)
@@ -1,5 +1,7 @@
 
+import os
 import re
+import shutil
 import zipfile
 from pathlib import Path
 from typing import List, Tuple
@@ -11,54 +13,65 @@ st.set_page_config(page_title="BC Real Estate Chapters — Mind Maps", layout="w
 
 def ensure_extracted(zip_path: Path, extract_dir: Path) -> list[Path]:
     extract_dir.mkdir(parents=True, exist_ok=True)
+    existing = set(os.listdir(extract_dir))  # one listdir instead of a stat per member
     with zipfile.ZipFile(zip_path, "r") as zf:
         html_members = [m for m in zf.namelist() if m.lower().endswith(".html")]
         for m in html_members:
-            target = extract_dir / Path(m).name
-            if not target.exists():
+            name = Path(m).name
+            if name not in existing:
+                target = extract_dir / name
                 with zf.open(m) as src, open(target, "wb") as dst:
-                    dst.write(src.read())
+                    shutil.copyfileobj(src, dst, length=1024 * 1024)
+                existing.add(name)
     return sorted(extract_dir.glob("*.html"))
 
+_RE_TITLE = re.compile(r"<title>(.*?)</title>", re.I | re.S)
+
 def html_title(html: str, fallback: str) -> str:
-    m = re.search(r"(?is)<title>(.*?)</title>", html)
-    if m:
-        return re.sub(r"\s+", " ", m.group(1)).strip() or fallback
-    return fallback
+    # Matched on the string itself: offsets found in html.lower() can drift,
+    # since lowercasing may change its length (e.g. "İ")
+    m = _RE_TITLE.search(html)
+    if not m:
+        return fallback
+    return " ".join(m.group(1).split()) or fallback
 
 def read_text(p: Path) -> str:
     return p.read_text(encoding="utf-8", errors="ignore")
 
-default_zip = Path(__file__).parent / "BCRealEstateChapters_mindmap.zip"
-if not default_zip.exists():
-    st.error("BCRealEstateChapters_mindmap.zip not found next to this app.")
-    st.stop()
-
-extract_dir = Path.cwd() / ".mindmaps_simple" / "default"
-html_files = ensure_extracted(default_zip, extract_dir)
-
-if not html_files:
-    st.error("No HTML files found in BCRealEstateChapters_mindmap.zip")
-    st.stop()
+TITLE_SCAN_BYTES = 8 * 1024
 
-titles = []
-for p in html_files:
-    try:
-        titles.append(html_title(read_text(p), p.stem))
-    except Exception:
-        titles.append(p.stem)
+def read_head(p: Path, n: int = TITLE_SCAN_BYTES) -> str:
+    # <title> sits in <head>, so the first few KB are enough
+    with open(p, "rb") as f:
+        return f.read(n).decode("utf-8", errors="ignore")
 
-st.sidebar.title("Chapters")
-options = [(i, titles[i]) for i in range(len(titles))]
-selected = st.sidebar.radio("Pick a chapter", options=options, format_func=lambda x: x[1], index=0, label_visibility="collapsed")
+def file_title(p: Path) -> str:
+    head = read_head(p)
+    title = html_title(head, "")
+    if not title and p.stat().st_size > TITLE_SCAN_BYTES:
+        title = html_title(read_text(p), "")  # unusually long <head>
+    return title or p.stem
 
-sel_idx = selected[0]
-selected_file = html_files[sel_idx]
+@st.cache_data(show_spinner=False, max_entries=4)
+def extract_cached(
+    zip_str: str, mtime_ns: int, extract_str: str, extract_mtime_ns: int
+) -> list[Path]:
+    # The mtimes only key the cache: a replaced ZIP is re-extracted, and so is
+    # an extract folder that was deleted or cleaned while the app was running
+    return ensure_extracted(Path(zip_str), Path(extract_str))
 
-st.header(titles[sel_idx])
-html_content = read_text(selected_file)
+@st.cache_data(show_spinner=False)
+def load_titles(paths: Tuple[str, ...], mtimes: Tuple[int, ...]) -> List[str]:
+    titles = []
+    for s in paths:
+        p = Path(s)
+        try:
+            titles.append(file_title(p))
+        except Exception:
+            titles.append(p.stem)
+    return titles
 
-wrapper = f"""
+WRAPPER_TEMPLATE = """
 <!doctype html>
 <html>
   <head>
@@ -79,9 +92,50 @@ wrapper = f"""
   </head>
   <body>
     <div class="container">
-      {html_content}
+      {body}
     </div>
   </body>
 </html>
 """
-st_html(wrapper, height=900, scrolling=True)
+
+@st.cache_data(show_spinner=False)
+def wrapped_html(path_str: str, mtime_ns: int) -> str:
+    # mtime_ns only keys the cache; re-picking a chapter costs no disk read
+    return WRAPPER_TEMPLATE.format(body=read_text(Path(path_str)))
+
+default_zip = Path(__file__).parent / "BCRealEstateChapters_mindmap.zip"
+if not default_zip.exists():
+    st.error("BCRealEstateChapters_mindmap.zip not found next to this app.")
+    st.stop()
+
+extract_dir = Path.cwd() / ".mindmaps_simple" / "default"
+extract_dir.mkdir(parents=True, exist_ok=True)
+html_files = extract_cached(
+    str(default_zip),
+    default_zip.stat().st_mtime_ns,
+    str(extract_dir),
+    extract_dir.stat().st_mtime_ns,
+)
+
+if not html_files:
+    st.error("No HTML files found in BCRealEstateChapters_mindmap.zip")
+    st.stop()
+
+titles = load_titles(
+    tuple(str(p) for p in html_files),
+    tuple(p.stat().st_mtime_ns for p in html_files),
+)
+
+st.sidebar.title("Chapters")
+options = [(i, titles[i]) for i in range(len(titles))]
+selected = st.sidebar.radio("Pick a chapter", options=options, format_func=lambda x: x[1], index=0, label_visibility="collapsed")
+
+sel_idx = selected[0]
+selected_file = html_files[sel_idx]
+
+st.header(titles[sel_idx])
+st_html(
+    wrapped_html(str(selected_file), selected_file.stat().st_mtime_ns),
+    height=900,
+    scrolling=True,
+)
@@ -1,11 +1,24 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import repeat
 from pathlib import Path
-import json
-import random
+import os
+import numpy as np
 import re
+import sys
+import threading
 import streamlit as st
 import streamlit.components.v1 as components
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from core.json_io import read_json
+from core.theme import hex_to_rgba, theme_option
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 # ---------- Page setup ----------
 st.set_page_config(page_title="Flashcards", layout="wide")
@@ -14,99 +27,169 @@ st.set_page_config(page_title="Flashcards", layout="wide")
 MODULE_DATA_DIR = Path(__file__).parents[1] / "modules" / "FlashCards" / "data"
 
 
-# ---------- Theme helpers ----------
-def _hex_to_rgba(hex_color: str, alpha: float) -> str:
-    h = (hex_color or "").lstrip("#")
-    if len(h) == 3:
-        h = "".join([c * 2 for c in h])
-    if len(h) != 6:
-        return f"rgba(154,160,166,{alpha})"
-    r = int(h[0:2], 16)
-    g = int(h[2:4], 16)
-    b = int(h[4:6], 16)
-    return f"rgba({r},{g},{b},{alpha})"
-
-
-def _opt(key: str, default: str) -> str:
-    try:
-        v = st.get_option(key)
-        if v is None or v == "" or str(v).lower() == "none":
-            return default
-        return v
-    except Exception:
-        return default
-
-
 # Pull individual theme options safely
-PRIMARY = _opt("theme.primaryColor", "#3b82f6")
-BG_CARD = _opt("theme.secondaryBackgroundColor", "#262730")
-TXT = _opt("theme.textColor", "#fafafa")
-TXT_MUTED = _hex_to_rgba(TXT, 0.65)
-TXT_MUTED_BG = _hex_to_rgba(TXT, 0.10)
-BORDER = _hex_to_rgba(TXT, 0.25)
-HOVER_BG = _hex_to_rgba(TXT, 0.06)
+PRIMARY = theme_option("theme.primaryColor", "#3b82f6")
+BG_CARD = theme_option("theme.secondaryBackgroundColor", "#262730")
+TXT = theme_option("theme.textColor", "#fafafa")
+TXT_MUTED = hex_to_rgba(TXT, 0.65)
+TXT_MUTED_BG = hex_to_rgba(TXT, 0.10)
 
 # ---------- Page-level CSS (toolbar/controls) ----------
-st.markdown(
-    f"""
+# Every colour below derives from the text colour, so the formatted sheet is
+# cached on it; Prev/Next reruns reuse the string
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _toolbar_css(txt: str) -> str:
+    border = hex_to_rgba(txt, 0.25)
+    hover_bg = hex_to_rgba(txt, 0.06)
+    return f"""
 <style>
-.page-title {{ color: {TXT}; margin-bottom: .25rem; }}
+.page-title {{ color: {txt}; margin-bottom: .25rem; }}
 
 /* Toolbar */
 .toolbar {{ display:flex; gap:.75rem; align-items:center; justify-content:center; margin:.25rem 0 .25rem; }}
 .toolbar .stButton > button {{
-  background: transparent; color: {TXT}; border:1px solid {BORDER}; border-radius:10px; padding:.55rem .9rem;
+  background: transparent; color: {txt}; border:1px solid {border}; border-radius:10px; padding:.55rem .9rem;
 }}
-.toolbar .stButton > button:hover {{ background: {HOVER_BG}; }}
+.toolbar .stButton > button:hover {{ background: {hover_bg}; }}
 
 /* Compact centered controls under the card */
 .controls-outer {{ display:grid; grid-template-columns: 1fr min(360px, 80vw) 1fr; }}
-.controls-inner {{ display:grid; grid-template-columns: 1fr 1fr 1fr; gap:.5rem; }}
+.controls-inner {{ display:grid; grid-template-columns: 1fr 1fr; gap:.5rem; }}
 .controls-inner .stButton > button {{
-  background: transparent; border:1px solid {BORDER}; color: {TXT};
+  background: transparent; border:1px solid {border}; color: {txt};
   border-radius: 9999px; padding:.55rem .9rem; cursor:pointer;
 }}
-.controls-inner .stButton > button:hover {{ background: {HOVER_BG}; }}
+.controls-inner .stButton > button:hover {{ background: {hover_bg}; }}
 
 /* Multiselect tags dark-friendly */
-.stMultiSelect [data-baseweb="tag"] {{ background:{_hex_to_rgba(TXT,0.12)}; color: {TXT}; }}
+.stMultiSelect [data-baseweb="tag"] {{ background:{hex_to_rgba(txt,0.12)}; color: {txt}; }}
 </style>
-""",
-    unsafe_allow_html=True,
-)
+"""
+
+
+st.markdown(_toolbar_css(TXT), unsafe_allow_html=True)
 
 st.markdown('<h1 class="page-title">Flashcards</h1>', unsafe_allow_html=True)
 
 
 # ---------- Data loading ----------
-@st.cache_data(show_spinner=False)
-def load_cards_from_module() -> list[dict]:
-    cards: list[dict] = []
-    if not MODULE_DATA_DIR.exists():
-        return cards
-    for jf in sorted(MODULE_DATA_DIR.glob("*.json")):
-        try:
-            data = json.loads(jf.read_text(encoding="utf-8"))
-        except Exception:
-            continue
-        chapter = infer_chapter_name(jf.stem)
-        for row in data:
-            q_raw = row.get("question", "")
-            a_raw = row.get("answer", "")
-            q = normalize_html(q_raw)
-            a = normalize_html(a_raw)
-            if q or a:
-                cards.append({"chapter": chapter, "front_html": q, "back_html": a})
-    return cards
+_RE_CHAPTER_NUM = re.compile(r"(\d+)")
+_RE_LET_STRONG = re.compile(r"([A-Za-z0-9])<\s*strong\b")
+_RE_STRONG_LET = re.compile(r"</\s*strong>([A-Za-z0-9])")
+_RE_STRONG_BLOCK = re.compile(r"<strong[^>]*>(.*?)</strong>", re.I | re.S)
+_RE_BR = re.compile(r"<br\s*/?>")
+_RE_WS = re.compile(r"\s+")
+_SHARE_MAX_LEN = 64
+_STREAM_MIN_BYTES = 2_000_000
+
+
+# Chapters are listed from filenames alone; a chapter file is only read and
+# normalized when a deck needs it, so "Test within Chapters" touches just the
+# selected files.
+@st.cache_data(show_spinner=False, ttl=24 * 3600, max_entries=4)
+def list_chapters(dir_mtime_ns: int) -> list[tuple[str, str]]:
+    """(chapter name, file stem) per chapter file, in filename order."""
+    with os.scandir(MODULE_DATA_DIR) as it:
+        stems = sorted(e.name[:-5] for e in it if e.name.endswith(".json") and e.is_file())
+    return [(infer_chapter_name(stem), stem) for stem in stems]
+
+
+@dataclass(frozen=True)
+class CardPool:
+    """One chapter's cards as parallel tuples; card j is front_html[j] / back_display_html[j]."""
+
+    chapter: str
+    front_html: tuple[str, ...] = ()
+    back_display_html: tuple[str, ...] = ()
+
+    def __len__(self) -> int:
+        return len(self.front_html)
+
+
+# cache_resource: the pool is immutable, so sessions share it as-is instead of
+# unpickling a copy of every card on each rerun; a rerun in any session is a
+# dict lookup. Edited files get a new mtime key, so the cap and TTL evict the
+# stale pools rather than letting them pile up on a long-running server.
+@st.cache_resource(show_spinner=False, ttl=24 * 3600, max_entries=64)
+def load_chapter(stem: str, mtime_ns: int) -> CardPool:
+    """Normalized cards of one chapter file (mtime_ns keys the cache so edits are re-read)."""
+    # Read/parse errors propagate: Streamlit doesn't cache a call that raised,
+    # so a fixed file is picked up on the next rerun
+    chapter = sys.intern(infer_chapter_name(stem))
+    fronts, backs = [], []
+    for row in _iter_rows(MODULE_DATA_DIR / f"{stem}.json"):
+        q_raw = row.get("question", "")
+        a_raw = row.get("answer", "")
+        q = normalize_html(q_raw)
+        a = normalize_html(a_raw)
+        if q or a:
+            fronts.append(_share(q))
+            # Derived once here so flipping a card never runs the regex
+            backs.append(_share(back_html_for(q, a)))
+    return CardPool(chapter, tuple(fronts), tuple(backs))
+
+
+def _iter_rows(path: Path):
+    # Large files are streamed one card at a time so the whole parsed list
+    # never sits in memory next to the file bytes; small ones take orjson
+    if ijson is not None and path.stat().st_size > _STREAM_MIN_BYTES:
+        with open(path, "rb") as f:
+            yield from ijson.items(f, "item")
+    else:
+        yield from read_json(path)
+
+
+def _share(html: str) -> str:
+    # Short fragments repeat across chapters ("(1) True", "(2) False"); interning
+    # keeps one copy of each. Long HTML rarely repeats, so it stays out of the
+    # process-wide intern table.
+    return sys.intern(html) if len(html) <= _SHARE_MAX_LEN else html
+
+
+def chapter_cards(stem: str) -> CardPool:
+    """Cards of <stem>.json, loading that file on first use."""
+    path = MODULE_DATA_DIR / f"{stem}.json"
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except OSError:
+        return CardPool(infer_chapter_name(stem))  # removed since the deck was built
+    try:
+        return load_chapter(stem, mtime_ns)
+    except Exception as e:
+        st.warning(f"Could not load {path.name}: {e}")
+        return CardPool(infer_chapter_name(stem))
+
+
+def _warm_chapter(stem: str, ctx):
+    # Pool thread: fill load_chapter's cache under the session's script
+    # context. Failures are left to chapter_cards, which reports them from
+    # the script thread.
+    add_script_run_ctx(threading.current_thread(), ctx)
+    try:
+        load_chapter(stem, (MODULE_DATA_DIR / f"{stem}.json").stat().st_mtime_ns)
+    except Exception:
+        pass
 
 
 def infer_chapter_name(stem: str) -> str:
-    m = re.search(r"(\d+)", stem)
+    # Fast path for the usual "ch_07"; same result as the regex because the
+    # head holds no digits
+    head, _, tail = stem.partition("_")
+    if tail.isdecimal() and head.isalpha():
+        return f"Chapter {tail.zfill(2)}"
+    m = _RE_CHAPTER_NUM.search(stem)
     if m:
         return f"Chapter {m.group(1).zfill(2)}"
     return stem.replace("_", " ").title()
 
 
+def _fix_strong(m: re.Match) -> str:
+    # Keep multi-word strong inline (collapse <br> inside)
+    inner = _RE_BR.sub(" ", m.group(1))
+    inner = _RE_WS.sub(" ", inner).strip()
+    return f"<strong>{inner}</strong>"
+
+
 def normalize_html(s: str) -> str:
     if not isinstance(s, str):
         return ""
@@ -116,28 +199,22 @@ def normalize_html(s: str) -> str:
         .replace("<br/>", "<br>")
         .strip()
     )
+    if "<" not in s:
+        return s  # plain text: none of the tag passes below can match
     # Add space when text touches <strong> boundaries like "a<strong>word</strong>b"
-    s = re.sub(r"([A-Za-z0-9])<\s*strong\b", r"\1 <strong", s)
-    s = re.sub(r"</\s*strong>([A-Za-z0-9])", r"</strong> \1", s)
-
-    # Keep multi-word strong inline (collapse <br> inside)
-    def _fix_strong(m: re.Match) -> str:
-        inner = re.sub(r"<br\s*/?>", " ", m.group(1))
-        inner = re.sub(r"\s+", " ", inner).strip()
-        return f"<strong>{inner}</strong>"
-
-    s = re.sub(r"<strong[^>]*>(.*?)</strong>", _fix_strong, s, flags=re.I | re.S)
+    s = _RE_LET_STRONG.sub(r"\1 <strong", s)
+    s = _RE_STRONG_LET.sub(r"</strong> \1", s)
+    s = _RE_STRONG_BLOCK.sub(_fix_strong, s)
     return s
 
 
-def back_html_for(card: dict) -> str:
+def back_html_for(q: str, a: str) -> str:
     """Prefer bold parts; else strip duplicated question; else show full answer."""
-    q = card.get("front_html", "") or ""
-    a = card.get("back_html", "") or ""
-    hits = re.findall(r"<strong[^>]*>(.*?)</strong>", a, flags=re.I | re.S)
-    hits = [h.strip() for h in hits if h and h.strip()]
-    if hits:
-        return "<br>".join(hits)
+    if "<strong" in a.lower():
+        hits = _RE_STRONG_BLOCK.findall(a)
+        hits = [h.strip() for h in hits if h and h.strip()]
+        if hits:
+            return "<br>".join(hits)
     if q and q in a:
         trimmed = a.replace(q, "").strip()
         if trimmed:
@@ -145,29 +222,67 @@ def back_html_for(card: dict) -> str:
     return a
 
 
-CARDS = load_cards_from_module()
-CHAPTERS = sorted({c["chapter"] for c in CARDS})
+CHAPTER_FILES = (
+    list_chapters(MODULE_DATA_DIR.stat().st_mtime_ns) if MODULE_DATA_DIR.exists() else []
+)
+CHAPTERS = sorted({name for name, _ in CHAPTER_FILES})
 
 
 # ---------- Deck builders ----------
-def build_deck_within(chapters: list[str]) -> list[int]:
-    idx = [i for i, c in enumerate(CARDS) if c["chapter"] in chapters]
-    random.shuffle(idx)
-    return idx
-
-
-def build_deck_all_interleaved() -> list[int]:
-    by_ch: dict[str, list[int]] = {}
-    for i, c in enumerate(CARDS):
-        by_ch.setdefault(c["chapter"], []).append(i)
-    for lst in by_ch.values():
-        random.shuffle(lst)
-    deck: list[int] = []
-    while any(by_ch.values()):
-        for ch in list(by_ch.keys()):
-            if by_ch[ch]:
-                deck.append(by_ch[ch].pop(0))
-    return deck
+# A deck is a list of [chapter file stem, card index in that file] pairs.
+# Keyed by stem, an entry still names the same file when chapters are added
+# or removed. Session state holds only these and the chapter names; card HTML
+# stays in the shared CardPool cache so it isn't copied into every session.
+_FC_KEYS = ("fc_deck", "fc_i", "fc_selected_chapters")
+
+
+def _reset_fc_state():
+    for k in _FC_KEYS:
+        st.session_state.pop(k, None)
+
+
+def _step(delta: int):
+    # on_click callback: runs before the script, so a click is one rerun, not two
+    last = len(st.session_state.get("fc_deck") or ()) - 1
+    i = int(st.session_state.get("fc_i", 0)) + delta
+    st.session_state["fc_i"] = max(0, min(i, last))
+
+
+def _deck_rows(stems: list[str], codes: np.ndarray, cards: np.ndarray) -> list[list]:
+    # numpy works on (chapter code, card) int pairs; codes become stems here
+    return [[stems[c], j] for c, j in zip(codes.tolist(), cards.tolist())]
+
+
+def build_deck_within(chapters: list[str]) -> list[list]:
+    wanted = set(chapters)
+    stems = [stem for name, stem in CHAPTER_FILES if name in wanted]
+    sizes = [len(chapter_cards(stem)) for stem in stems]
+    if not sum(sizes):
+        return []
+    codes = np.repeat(np.arange(len(stems), dtype=np.int32), sizes)
+    cards = np.concatenate([np.arange(n, dtype=np.int32) for n in sizes])
+    order = np.random.default_rng().permutation(len(codes))
+    return _deck_rows(stems, codes[order], cards[order])
+
+
+def build_deck_all_interleaved() -> list[list]:
+    if not CHAPTER_FILES:
+        return []
+    stems = [stem for _, stem in CHAPTER_FILES]
+    # Test All needs every chapter; files not cached yet are read in parallel
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=min(8, len(stems))) as ex:
+        list(ex.map(_warm_chapter, stems, repeat(ctx)))
+    sizes = [len(chapter_cards(stem)) for stem in stems]
+    rng = np.random.default_rng()
+    # Round-robin one card per chapter: one row per chapter, padded with -1,
+    # read column by column; shorter chapters drop out as they run dry
+    grid = np.full((len(sizes), max(sizes)), -1, dtype=np.int32)
+    for code, n in enumerate(sizes):
+        grid[code, :n] = rng.permutation(n)
+    by_col = grid.T
+    col, codes = np.nonzero(by_col >= 0)
+    return _deck_rows(stems, codes, by_col[col, codes])
 
 
 # ---------- Toolbar ----------
@@ -192,65 +307,64 @@ if start_within:
     if not selected:
         st.warning("Select at least one chapter.")
     else:
+        _reset_fc_state()
         st.session_state["fc_deck"] = build_deck_within(selected)
         st.session_state["fc_i"] = 0
-        st.session_state["fc_flipped"] = False
         st.session_state["fc_selected_chapters"] = list(selected)
 
 if start_all:
+    _reset_fc_state()
     st.session_state["fc_deck"] = build_deck_all_interleaved()
     st.session_state["fc_i"] = 0
-    st.session_state["fc_flipped"] = False
     st.session_state["fc_selected_chapters"] = None
 
-# ---------- Card UI (component: click-to-flip) + compact controls ----------
-deck = st.session_state.get("fc_deck")
+# ---------- Card HTML ----------
+def _minify(html: str) -> str:
+    # The templates below keep one statement per line and no // comments, so
+    # joining the stripped lines is safe
+    return "".join(line.strip() for line in html.splitlines())
 
-if not CARDS:
-    st.error(
-        "No flashcards found. Put your JSON files in `modules/FlashCards/data/` (e.g., `ch_00.json`)."
-    )
-elif not deck:
-    st.info("Press **Test within Chapters** or **Test All** to begin.")
-else:
-    # Read current state
-    i = int(st.session_state.get("fc_i", 0))
-    i = max(0, min(i, len(deck) - 1))
-    st.session_state["fc_i"] = i
-    flipped = bool(st.session_state.get("fc_flipped", False))
-    card = CARDS[deck[i]]
-    content_html = back_html_for(card) if flipped else card["front_html"]
 
-    # Render the card as an HTML component that sends "flip" on click (back-compat postMessage)
-    card_height = 420  # px
-    comp_val = components.html(
-        f"""
+# Theme-dependent part of the component document; formatted once per theme
+_CARD_HEAD_TMPL = _minify(
+    """
 <!DOCTYPE html>
 <html>
 <head>
 <meta charset="utf-8"/>
 <style>
   :root {{
-    --card-bg: {BG_CARD};
-    --card-fg: {TXT};
-    --muted: {TXT_MUTED};
-    --accent: {PRIMARY};
-    --hint-bg: {TXT_MUTED_BG};
+    --card-bg: {bg_card};
+    --card-fg: {txt};
+    --muted: {txt_muted};
+    --accent: {primary};
+    --hint-bg: {txt_muted_bg};
   }}
   body {{ margin:0; padding:0; background: transparent; color: var(--card-fg); font-family: system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif; }}
   .wrap {{ display:flex; justify-content:center; }}
   .card {{
     width: min(1100px, 92vw);
-    min-height: {card_height - 24}px;  /* minus padding/margins for the iframe */
+    margin: 0.2rem auto 0;
+    perspective: 1600px;
+    cursor: pointer; /* clickable */
+  }}
+  /* Both faces share one grid cell, so the card is as tall as the longer face */
+  .card-inner {{ display:grid; transition: transform .4s ease; transform-style: preserve-3d; }}
+  .card.flipped .card-inner {{ transform: rotateY(180deg); }}
+  .face {{
+    grid-area: 1 / 1;
+    min-height: {min_height}px;  /* minus padding/margins for the iframe */
     background: var(--card-bg);
     color: var(--card-fg);
     border-radius: 18px;
     box-shadow: 0 30px 80px rgba(0,0,0,.35);
-    margin: 0.2rem auto 0;
     padding: clamp(28px, 4vw, 56px);
     position: relative;
-    cursor: pointer; /* clickable */
+    backface-visibility: hidden;
+    -webkit-backface-visibility: hidden;
   }}
+  .face.back {{ transform: rotateY(180deg); }}
+  @media (prefers-reduced-motion: reduce) {{ .card-inner {{ transition: none; }} }}
   .hint {{ position:absolute; top:12px; left:18px; color: var(--muted); font-size:.85rem; }}
   .progress {{ position:absolute; bottom:12px; left:18px; color: var(--muted); font-size:.85rem; }}
   .chapter {{ position:absolute; top:12px; right:18px; color: rgba(255,255,255,.8); font-size:.85rem; }}
@@ -266,66 +380,135 @@ else:
   }}
 </style>
 </head>
+"""
+)
+
+# Per-card part: both faces are in the document and flipping only toggles a
+# class, so it never round-trips to Python
+_CARD_BODY_TMPL = _minify(
+    """
 <body>
   <div class="wrap">
     <div id="card" class="card" role="button" tabindex="0" aria-label="Flashcard">
-      <div class="hint">{'Back (answer)' if flipped else 'Front (question)'}</div>
-      <div class="chapter">{card['chapter']}</div>
-      <div class="center">{content_html}</div>
-      <div class="progress">{i+1} / {len(deck)}</div>
-      <div class="clickhint">Click on the card to flip</div>
+      <div class="card-inner">
+        <div class="face front">
+          <div class="hint">Front (question)</div>
+          <div class="chapter">{chapter}</div>
+          <div class="center">{front}</div>
+          <div class="progress">{progress}</div>
+          <div class="clickhint">Click on the card to flip</div>
+        </div>
+        <div class="face back">
+          <div class="hint">Back (answer)</div>
+          <div class="chapter">{chapter}</div>
+          <div class="center">{back}</div>
+          <div class="progress">{progress}</div>
+          <div class="clickhint">Click on the card to flip</div>
+        </div>
+      </div>
     </div>
   </div>
 
   <script>
-    function sendFlip() {{
-      // Older Streamlit html() expects a postMessage protocol like this:
-      const msg = {{ isStreamlitMessage: true, type: "streamlit:setComponentValue", value: "flip" }};
-      if (window.parent) window.parent.postMessage(msg, "*");
-    }}
     const el = document.getElementById("card");
-    el.addEventListener("click", sendFlip);
+    function flip() {{ el.classList.toggle("flipped"); }}
+    el.addEventListener("click", flip);
     el.addEventListener("keydown", (e) => {{
       if (e.code === "Space" || e.code === "Enter" || e.key === " ") {{
-        e.preventDefault(); sendFlip();
+        e.preventDefault(); flip();
       }}
     }});
   </script>
 </body>
 </html>
-        """,
-        height=card_height,
-        scrolling=False,  # NOTE: no key=... here
+"""
+)
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _card_head(theme: tuple[str, str, str, str, str], card_height: int) -> str:
+    bg_card, txt, txt_muted, primary, txt_muted_bg = theme
+    return _CARD_HEAD_TMPL.format_map(
+        {
+            "bg_card": bg_card,
+            "txt": txt,
+            "txt_muted": txt_muted,
+            "primary": primary,
+            "txt_muted_bg": txt_muted_bg,
+            "min_height": card_height - 24,
+        }
     )
 
-    # When the component reports "flip", toggle and rerun
-    if comp_val == "flip":
-        st.session_state["fc_flipped"] = not flipped
+
+def build_card_html(
+    chapter: str,
+    front_html: str,
+    back_html: str,
+    i: int,
+    n: int,
+    theme: tuple[str, str, str, str, str],
+    card_height: int,
+) -> str:
+    """Full component document for one card, both faces included."""
+    return _card_head(theme, card_height) + _CARD_BODY_TMPL.format_map(
+        {
+            "chapter": chapter,
+            "front": front_html,
+            "back": back_html,
+            "progress": f"{i + 1} / {n}",
+        }
+    )
+
+
+# ---------- Card UI (component: click-to-flip) + compact controls ----------
+deck = st.session_state.get("fc_deck")
+
+if not CHAPTER_FILES:
+    st.error(
+        "No flashcards found. Put your JSON files in `modules/FlashCards/data/` (e.g., `ch_00.json`)."
+    )
+elif not deck:
+    st.info("Press **Test within Chapters** or **Test All** to begin.")
+else:
+    # Read current state
+    i = int(st.session_state.get("fc_i", 0))
+    i = max(0, min(i, len(deck) - 1))
+    st.session_state["fc_i"] = i
+    stem, j = deck[i]
+    pool = chapter_cards(stem)
+    if j >= len(pool):
+        # Chapter files changed under this deck; start over
+        _reset_fc_state()
         st.rerun()
 
-    # Compact centered control row (Prev / Flip / Next)
+    # Render the card as an HTML component; it flips itself on click/Space/Enter
+    card_height = 420  # px
+    components.html(
+        build_card_html(
+            pool.chapter,
+            pool.front_html[j],
+            pool.back_display_html[j],
+            i,
+            len(deck),
+            (BG_CARD, TXT, TXT_MUTED, PRIMARY, TXT_MUTED_BG),
+            card_height,
+        ),
+        height=card_height,
+        scrolling=False,  # NOTE: no key=... here
+    )
+
+    # Compact centered control row (Prev / Next)
     st.markdown('<div class="controls-outer">', unsafe_allow_html=True)
     _, controls_col, _ = st.columns([1, 1, 1])
     with controls_col:
         st.markdown('<div class="controls-inner">', unsafe_allow_html=True)
-        c1, c2, c3 = st.columns(3)
+        c1, c2 = st.columns(2)
 
         with c1:
-            if st.button("◀ Prev", key="fc_prev"):
-                st.session_state["fc_i"] = max(0, i - 1)
-                st.session_state["fc_flipped"] = False
-                st.rerun()
+            st.button("◀ Prev", key="fc_prev", on_click=_step, args=(-1,))
 
         with c2:
-            if st.button("Flip", key="fc_flip"):
-                st.session_state["fc_flipped"] = not flipped
-                st.rerun()
-
-        with c3:
-            if st.button("Next ▶", key="fc_next"):
-                st.session_state["fc_i"] = min(len(deck) - 1, i + 1)
-                st.session_state["fc_flipped"] = False
-                st.rerun()
+            st.button("Next ▶", key="fc_next", on_click=_step, args=(1,))
 
         st.markdown("</div>", unsafe_allow_html=True)
     st.markdown("</div>", unsafe_allow_html=True)
@@ -0,0 +1,25 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# app.py puts the MCQ folder on sys.path the same way
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "modules" / "MCQ"))
+
+import csv_loader
+
+
+@pytest.mark.skipif(csv_loader.cn_from_bytes is None, reason="charset-normalizer not installed")
+def test_cp1252_tail_after_long_ascii_head(tmp_path):
+    head = "question,answer\n" + "What is a lease?,1\n" * 5000  # > _PROBE_BYTES of ASCII
+    tail = "Café owner’s “résumé” clause,2\n"
+    assert len(head) > csv_loader._PROBE_BYTES
+    path = tmp_path / "cp1252.csv"
+    path.write_bytes((head + tail).encode("cp1252"))
+
+    warnings = []
+    text = csv_loader._read_csv_text(str(path), warn=warnings.append)
+
+    assert text.endswith(tail)
+    assert "�" not in text
+    assert warnings == []